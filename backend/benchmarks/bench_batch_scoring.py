@@ -0,0 +1,59 @@
+"""
+Offline throughput benchmark for batch candidate scoring.
+
+Runs score_candidates_batch against the local fake LLM (no network) with a
+simulated per-call latency and reports resumes/second per concurrency level.
+
+    python -m backend.benchmarks.bench_batch_scoring --resumes 500 --latency-ms 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+SKILLS = [
+    "python", "fastapi", "django", "sql", "postgresql", "docker", "kubernetes", "aws",
+    "react", "typescript", "java", "spark", "airflow", "pandas", "pytorch", "langchain",
+    "terraform", "redis", "kafka", "graphql", "golang", "linux", "ci/cd", "figma",
+]
+
+JOB_DESCRIPTION = (
+    "We are hiring a backend engineer with Python, FastAPI, PostgreSQL, Docker, "
+    "AWS and Kafka experience to build scalable hiring products."
+)
+
+def make_resumes(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        {
+            "filename": f"candidate_{i:04d}.pdf",
+            "resume_text": f"Candidate {i}. Skills: " + ", ".join(rng.sample(SKILLS, rng.randint(3, 10))),
+            "error": "",
+        }
+        for i in range(count)
+    ]
+
+async def run(resumes: int, concurrency_levels, latency_ms: int):
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(latency_ms)
+    from backend.services.candidate_score_service import score_candidates_batch
+
+    items = make_resumes(resumes)
+    print(f"{resumes} resumes, fake LLM latency {latency_ms} ms")
+    for concurrency in concurrency_levels:
+        start = time.perf_counter()
+        results = await score_candidates_batch(items, JOB_DESCRIPTION, max_concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        errors = sum(1 for r in results if r["error"])
+        print(f"concurrency={concurrency:>3}  {elapsed:7.2f}s  {resumes / elapsed:8.1f} resumes/s  errors={errors}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=200)
+    parser.add_argument("--latency-ms", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+    asyncio.run(run(args.resumes, args.concurrency, args.latency_ms))
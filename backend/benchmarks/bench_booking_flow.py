@@ -0,0 +1,59 @@
+"""
+Offline load test of the booking flow on the local calendar backend:
+availability lookup -> slot lock -> event insert, from many threads.
+No Google credentials are used; all state lives in a temporary directory.
+
+    python -m backend.benchmarks.bench_booking_flow --requests 5000 --threads 16
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from backend.services import booking_db, calendar_service, lock_service
+from backend.services.calendar_backend import LocalCalendarBackend
+
+def run(requests: int, threads: int, days: int):
+    workdir = tempfile.mkdtemp(prefix="bench_booking_")
+    booking_db.DB_PATH = os.path.join(workdir, "calendar_booking.db")
+    calendar_service.set_calendar_backend(LocalCalendarBackend(os.path.join(workdir, "local_calendar.db")))
+
+    start_day = datetime.date.today() + datetime.timedelta(days=1)
+    dates = [(start_day + datetime.timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+    counts = {"booked": 0, "conflict": 0, "no_slots": 0}
+    counts_lock = threading.Lock()
+
+    def one_request(i):
+        rng = random.Random(i)
+        date = rng.choice(dates)
+        slots = calendar_service.get_available_slots_range(date, date)[date]
+        if not slots:
+            outcome = "no_slots"
+        else:
+            slot = rng.choice(slots)["start"]
+            if lock_service.lock_slot(slot):
+                calendar_service.book_slot(f"Candidate {i}", f"candidate{i}@example.com", slot)
+                outcome = "booked"
+            else:
+                outcome = "conflict"
+        with counts_lock:
+            counts[outcome] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{requests} requests on {threads} threads in {elapsed:.2f}s -> {requests / elapsed:.0f} req/s")
+    print(f"booked={counts['booked']} conflict={counts['conflict']} no_slots={counts['no_slots']} (state in {workdir})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--days", type=int, default=20)
+    args = parser.parse_args()
+    run(args.requests, args.threads, args.days)
@@ -0,0 +1,71 @@
+"""
+Email rendering cost per message for a bulk campaign: compiling the
+templates for every message vs the precompiled templates loaded at startup,
+and the full multipart message (render + MIME build + serialisation) that
+the outbox stores. Also checks that markup in candidate-supplied fields
+comes out escaped in the HTML part.
+
+    python -m backend.benchmarks.bench_email_render --messages 2000
+"""
+import argparse
+import time
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from backend.utils import email_templates
+from backend.utils.email_templates import build_message, load_templates, render_email
+
+def make_context(i: int) -> dict:
+    return {"candidate_name": f"Candidate {i}", "job_title": "Senior Backend Engineer", "score": 60 + i % 40}
+
+def render_uncached(context: dict):
+    # What rendering costs without the startup cache: parse + compile every time
+    env = Environment(loader=FileSystemLoader(email_templates.TEMPLATE_DIR),
+                      autoescape=select_autoescape(enabled_extensions=("html",)),
+                      trim_blocks=True, lstrip_blocks=True)
+    return tuple(env.get_template(f"shortlisting{suffix}").render(context)
+                 for suffix in (".subject.txt", ".txt", ".html"))
+
+def render_precompiled(context: dict):
+    return render_email("shortlisting", **context)
+
+def build_serialised(context: dict):
+    return build_message("hr@example.com", "candidate@example.com", "shortlisting", **context).as_bytes()
+
+def per_message_us(fn, messages: int) -> float:
+    contexts = [make_context(i) for i in range(messages)]
+    start = time.perf_counter()
+    for context in contexts:
+        fn(context)
+    return (time.perf_counter() - start) / messages * 1e6
+
+def check_escaping():
+    hostile = '<script>alert("x")</script> & "Bobby"'
+    _, text, html = render_email("shortlisting", candidate_name=hostile, job_title="<b>Engineer</b>", score=90)
+    assert "<script>" not in html and "&lt;script&gt;" in html, "HTML part is not escaped"
+    assert "<b>Engineer</b>" not in html
+    assert hostile in text, "plain-text part should carry the name verbatim"
+
+    _, _, html = render_email(
+        "slot_selection", candidate_name="A", interview_date="2025-07-25",
+        slots=[{"label": "10:00", "booking_url": 'http://x/book-slot?name="><img src=x>'}]
+    )
+    assert '"><img' not in html, "booking link can break out of the href attribute"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    loaded = load_templates()
+    print(f"load_templates: {loaded} emails compiled in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    check_escaping()
+    print("escaping check: ok")
+
+    # The uncached path is slow; a tenth of the messages is plenty to time it
+    uncached = per_message_us(render_uncached, max(1, args.messages // 10))
+    precompiled = per_message_us(render_precompiled, args.messages)
+    full = per_message_us(build_serialised, args.messages)
+    print(f"compile per message:        {uncached:8.1f} us/message")
+    print(f"precompiled render:         {precompiled:8.1f} us/message ({uncached / precompiled:.0f}x faster)")
+    print(f"render + MIME + as_bytes(): {full:8.1f} us/message")
@@ -0,0 +1,114 @@
+"""
+Recall of the TF-IDF pre-filter against a reference ranking.
+
+The reference is either the labelled scores in a fixture file or full
+scoring by the real LLM; every resume is also ranked by the local
+pre-filter. recall@K is the share of the reference top-N candidates that
+survive a pre-filter shortlist of size K.
+
+    python -m backend.benchmarks.bench_prefilter_recall --fixture labelled.json
+    GOOGLE_API_KEY=... python -m backend.benchmarks.bench_prefilter_recall --resumes 300 --top-n 10
+
+A fixture file is {"job_description": str, "resumes": [str, ...]} with an
+optional "scores": [number, ...] (one label per resume). LLM_BACKEND=fake is
+itself a keyword-overlap scorer, so it is refused as a reference unless
+--allow-fake is given (pipeline smoke test only; the recall is meaningless).
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+ROLE_SKILLS = {
+    "backend": ["python", "fastapi", "django", "postgresql", "redis", "kafka", "docker", "aws", "rest apis"],
+    "frontend": ["react", "typescript", "javascript", "css", "figma", "next.js", "accessibility", "jest"],
+    "data": ["spark", "airflow", "pandas", "sql", "dbt", "snowflake", "python", "tableau"],
+    "ml": ["pytorch", "tensorflow", "scikit-learn", "python", "mlops", "langchain", "nlp", "embeddings"],
+    "devops": ["kubernetes", "terraform", "aws", "linux", "ci/cd", "prometheus", "docker", "ansible"],
+}
+
+FILLER = (
+    "Collaborated with cross-functional teams, mentored junior engineers and "
+    "delivered projects on schedule in a fast-paced environment."
+)
+
+def make_fixture(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    roles = list(ROLE_SKILLS)
+    resumes = []
+    for i in range(count):
+        role = rng.choice(roles)
+        skills = rng.sample(ROLE_SKILLS[role], rng.randint(3, len(ROLE_SKILLS[role])))
+        extra = rng.sample(ROLE_SKILLS[rng.choice(roles)], 2)
+        resumes.append(
+            f"Candidate {i}, {rng.randint(1, 12)} years as a {role} engineer. "
+            f"Skills: {', '.join(skills + extra)}. {FILLER}"
+        )
+    job_description = (
+        "Senior backend engineer. Build APIs in Python with FastAPI and PostgreSQL, "
+        "run services on Docker and AWS, stream events through Kafka, cache with Redis."
+    )
+    return {"job_description": job_description, "resumes": resumes}
+
+async def llm_scores(resumes, job_description, concurrency):
+    from backend.services.candidate_score_service import score_candidates_batch
+    items = [{"filename": str(i), "resume_text": text, "error": ""} for i, text in enumerate(resumes)]
+    results = await score_candidates_batch(items, job_description, max_concurrency=concurrency)
+    return {int(r["filename"]): r["score"] for r in results if r["score"] is not None}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixture", help="JSON fixture file (default: generated)")
+    parser.add_argument("--resumes", type=int, default=300)
+    parser.add_argument("--top-n", type=int, default=10, help="size of the LLM reference shortlist")
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 20, 30, 50, 100])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--allow-fake", action="store_true",
+                        help="accept LLM_BACKEND=fake as the reference (smoke test only)")
+    args = parser.parse_args()
+
+    if args.fixture:
+        with open(args.fixture) as f:
+            fixture = json.load(f)
+    else:
+        fixture = make_fixture(args.resumes)
+    resumes, job_description = fixture["resumes"], fixture["job_description"]
+
+    from backend.services.resume_prefilter_service import rank_resumes
+
+    start = time.perf_counter()
+    if fixture.get("scores") is not None:
+        if len(fixture["scores"]) != len(resumes):
+            sys.exit("fixture 'scores' must have one label per resume")
+        scores = {i: score for i, score in enumerate(fixture["scores"]) if score is not None}
+        reference_name = "labelled"
+    else:
+        from backend.llm.llm_setup import LLM_BACKEND
+        if LLM_BACKEND == "fake":
+            if not args.allow_fake:
+                sys.exit(
+                    "LLM_BACKEND=fake is a keyword-overlap scorer, so recall against it says nothing "
+                    "about the LLM. Pass a --fixture with labelled 'scores', use the real LLM, "
+                    "or --allow-fake for a smoke test."
+                )
+            print("WARNING: reference ranking comes from the fake keyword LLM; recall below is not meaningful")
+        scores = asyncio.run(llm_scores(resumes, job_description, args.concurrency))
+        reference_name = "LLM"
+    llm_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ranking = rank_resumes(resumes, job_description)
+    prefilter_seconds = time.perf_counter() - start
+
+    reference = set(sorted(scores, key=lambda i: -scores[i])[:args.top_n])
+    order = [entry["index"] for entry in ranking]
+
+    print(f"{len(resumes)} resumes | {reference_name} reference {llm_seconds:.2f}s | pre-filter {prefilter_seconds * 1000:.1f} ms")
+    for k in args.k:
+        recall = len(reference & set(order[:k])) / len(reference) if reference else 0.0
+        print(f"recall@{k:<4} ({reference_name} top {args.top_n}) = {recall:.2f}")
+
+if __name__ == "__main__":
+    main()
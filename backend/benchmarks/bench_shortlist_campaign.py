@@ -0,0 +1,80 @@
+"""
+Offline test of bulk shortlisting: times one campaign of N candidates (one
+transaction for every workflow row and outbox message), advances some of
+them to later stages, then re-submits the same campaign and checks that
+nobody is emailed twice and that later-stage workflows keep their status
+and created_at, for the bulk and the single-candidate path. Mail only
+queues in the outbox; no SMTP is used.
+
+    python -m backend.benchmarks.bench_shortlist_campaign --candidates 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+from backend.services import booking_db
+
+JOB_TITLE = "Backend Engineer"
+
+def workflows() -> dict:
+    return {
+        row["candidate_email"]: (row["status"], row["created_at"])
+        for row in booking_db.fetch_all(
+            "SELECT candidate_email, status, created_at FROM candidate_workflow WHERE job_title = ?", (JOB_TITLE,)
+        )
+    }
+
+def run(candidates: int):
+    workdir = tempfile.mkdtemp(prefix="bench_shortlist_")
+    booking_db.DB_PATH = os.path.join(workdir, "calendar_booking.db")
+    # Imported after DB_PATH is set: the service migrates on creation
+    from backend.services.email_workflow_service import EmailWorkflowService
+    service = EmailWorkflowService()
+
+    batch = [
+        {"candidate_email": f"candidate{i}@example.com", "candidate_name": f"Candidate {i}", "score": 70 + i % 30}
+        for i in range(candidates)
+    ]
+
+    started = time.perf_counter()
+    first = service.shortlist_candidates_bulk(batch, JOB_TITLE, "campaign-1")
+    elapsed = time.perf_counter() - started
+    print(f"{candidates} candidates shortlisted in {elapsed:.2f}s -> {candidates / elapsed:,.0f} candidates/s")
+    assert all(r["status"] == "queued" for r in first)
+
+    # Every third candidate has moved on: slots offered or interview booked
+    booking_db.execute("""
+        UPDATE candidate_workflow
+        SET status = CASE WHEN id % 2 = 0 THEN 'slots_sent' ELSE 'interview_scheduled' END,
+            created_at = '2000-01-01 00:00:00'
+        WHERE id % 3 = 0
+    """)
+    before = workflows()
+
+    retry = service.shortlist_candidates_bulk(batch, JOB_TITLE, "campaign-1")
+    after = workflows()
+    later_stage = {email for email, (status, _) in before.items() if status != "shortlisted"}
+
+    assert all(after[email] == before[email] for email in later_stage), "retry reset a later-stage workflow"
+    assert not any(r["status"] == "queued" for r in retry), "retry queued a second email"
+    queued = booking_db.fetch_one("SELECT COUNT(*) AS n FROM email_outbox")["n"]
+    assert queued == candidates, f"{queued} messages queued for {candidates} candidates"
+    print(f"retry: {len(later_stage)} later-stage workflows unchanged, {queued} messages in the outbox")
+
+    # The single-candidate path follows the same rules
+    moved_on = next(iter(later_stage))
+    still_shortlisted = next(email for email, (status, _) in after.items() if status == "shortlisted")
+    assert service.shortlist_candidate(moved_on, "Moved On", JOB_TITLE, 90) == "skipped"
+    assert service.shortlist_candidate("newcomer@example.com", "Newcomer", JOB_TITLE, 90) == "queued"
+    assert service.shortlist_candidate("newcomer@example.com", "Newcomer", JOB_TITLE, 90) == "duplicate"
+    service.shortlist_candidate(still_shortlisted, "Still Shortlisted", JOB_TITLE, 90)
+    final = workflows()
+    assert final[moved_on] == before[moved_on], "single shortlist reset a later-stage workflow"
+    assert final[still_shortlisted] == after[still_shortlisted], "single shortlist reset created_at"
+    print(f"single shortlist: later-stage workflow unchanged, repeat shortlist not re-emailed (state in {workdir})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.candidates)
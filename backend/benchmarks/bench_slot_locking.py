@@ -0,0 +1,66 @@
+"""
+Concurrency check for slot locking: N threads released at the same instant
+all try to lock the same slot, for several rounds. Exactly one winner per
+round is required; lock latency is reported. Uses a temporary database.
+
+    python -m backend.benchmarks.bench_slot_locking --bookers 100 --rounds 50
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from backend.services import booking_db, lock_service
+
+def run_round(slot: str, bookers: int):
+    barrier = threading.Barrier(bookers)
+    wins = []
+    latencies = []
+    record = threading.Lock()
+
+    def booker():
+        barrier.wait()
+        start = time.perf_counter()
+        won = lock_service.lock_slot(slot)
+        elapsed = time.perf_counter() - start
+        with record:
+            latencies.append(elapsed)
+            if won:
+                wins.append(threading.get_ident())
+
+    threads = [threading.Thread(target=booker) for _ in range(bookers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(wins), latencies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookers", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    booking_db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_lock_"), "calendar_booking.db")
+    booking_db.migrate()
+
+    all_latencies = []
+    bad_rounds = 0
+    started = time.perf_counter()
+    for i in range(args.rounds):
+        winners, latencies = run_round(f"2030-01-01T10:{i % 60:02d}:00+05:30#{i}", args.bookers)
+        all_latencies.extend(latencies)
+        if winners != 1:
+            bad_rounds += 1
+            print(f"round {i}: {winners} winners")
+    elapsed = time.perf_counter() - started
+
+    attempts = args.bookers * args.rounds
+    all_latencies.sort()
+    print(f"{args.rounds} rounds x {args.bookers} bookers: {attempts} lock attempts in {elapsed:.2f}s")
+    print(f"single winner in {args.rounds - bad_rounds}/{args.rounds} rounds")
+    print(f"lock latency ms: median {statistics.median(all_latencies) * 1000:.2f}, "
+          f"p99 {all_latencies[int(len(all_latencies) * 0.99) - 1] * 1000:.2f}")
+    if bad_rounds:
+        raise SystemExit(1)
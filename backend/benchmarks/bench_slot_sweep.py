@@ -0,0 +1,73 @@
+"""
+Micro-benchmark: legacy per-slot overlap scan vs merge + linear sweep.
+
+Generates a busy calendar (several meetings per day) for ranges of 1 to 90
+days and times free-slot computation over the whole range with both
+approaches. No calendar API access is needed.
+
+    python -m backend.benchmarks.bench_slot_sweep --meetings-per-day 12
+"""
+import argparse
+import datetime
+import random
+import time
+from backend.services.slot_engine import merge_busy_intervals, free_slots_sweep, parse_busy
+
+TZ = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+def make_busy(days: int, meetings_per_day: int, seed: int = 3):
+    rng = random.Random(seed)
+    start = datetime.datetime(2025, 1, 6, 0, 0, tzinfo=TZ)
+    busy = []
+    for day in range(days):
+        day_start = start + datetime.timedelta(days=day, hours=9)
+        for _ in range(meetings_per_day):
+            begin = day_start + datetime.timedelta(minutes=rng.randrange(0, 11 * 60, 15))
+            busy.append({
+                "start": begin.isoformat(),
+                "end": (begin + datetime.timedelta(minutes=rng.choice([15, 30, 45, 60, 90]))).isoformat()
+            })
+    rng.shuffle(busy)
+    return start, start + datetime.timedelta(days=days), busy
+
+def legacy_slots(window_start, window_end, busy_times, slot_duration=30):
+    current = window_start
+    available = []
+    while current + datetime.timedelta(minutes=slot_duration) <= window_end:
+        slot_end = current + datetime.timedelta(minutes=slot_duration)
+        overlap = False
+        for busy in busy_times:
+            busy_start = datetime.datetime.fromisoformat(busy['start'])
+            busy_end = datetime.datetime.fromisoformat(busy['end'])
+            if current < busy_end and slot_end > busy_start:
+                overlap = True
+                break
+        if not overlap:
+            available.append((current, slot_end))
+        current = slot_end
+    return available
+
+def sweep_slots(window_start, window_end, busy_times, slot_duration=30):
+    return free_slots_sweep(window_start, window_end, merge_busy_intervals(parse_busy(busy_times)), slot_duration)
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 7, 30, 90])
+    parser.add_argument("--meetings-per-day", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'days':>5} {'busy':>6} {'legacy ms':>11} {'sweep ms':>10} {'speedup':>8}")
+    for days in args.days:
+        window_start, window_end, busy = make_busy(days, args.meetings_per_day)
+        legacy_time, legacy = timed(legacy_slots, window_start, window_end, busy)
+        sweep_time, sweep = timed(sweep_slots, window_start, window_end, busy)
+        assert legacy == sweep, "sweep result differs from legacy scan"
+        print(f"{days:>5} {len(busy):>6} {legacy_time * 1000:>11.2f} {sweep_time * 1000:>10.2f} {legacy_time / sweep_time:>7.1f}x")
@@ -0,0 +1,76 @@
+"""
+SMTP throughput: a new connection per message (the old behaviour) vs the
+shared connection pool, against a local aiosmtpd server. Pass
+--handshake-ms to simulate the TLS handshake + login latency of a real
+provider on every new session.
+
+    pip install aiosmtpd
+    python -m backend.benchmarks.bench_smtp_pool --messages 300 --handshake-ms 150
+"""
+import argparse
+import asyncio
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from aiosmtpd.controller import Controller
+from backend.utils.smtp_pool import SMTPPool
+
+HOST, PORT = "127.0.0.1", 8025
+
+class CountingHandler:
+    def __init__(self, handshake_ms: int):
+        self.handshake_ms = handshake_ms
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        # EHLO happens once per session: stand-in for TLS + AUTH round trips
+        await asyncio.sleep(self.handshake_ms / 1000)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+def make_message(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "hr@example.com"
+    msg["To"] = f"candidate{i}@example.com"
+    msg["Subject"] = "Interview shortlist"
+    msg.set_content("Congratulations, you have been shortlisted.")
+    return msg
+
+def send_unpooled(msg):
+    with smtplib.SMTP(HOST, PORT) as server:
+        server.send_message(msg)
+
+def timed(send, messages: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda i: send(make_message(i)), range(messages)))
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--handshake-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    handler = CountingHandler(args.handshake_ms)
+    controller = Controller(handler, hostname=HOST, port=PORT)
+    controller.start()
+    try:
+        unpooled = timed(send_unpooled, args.messages, args.threads)
+        smtp_pool = SMTPPool(host=HOST, port=PORT, security="none", username="", size=args.threads)
+        pooled = timed(smtp_pool.send, args.messages, args.threads)
+        smtp_pool.close()
+    finally:
+        controller.stop()
+
+    assert handler.received == 2 * args.messages, f"server received {handler.received} messages"
+    print(f"{args.messages} messages, {args.threads} threads, {args.handshake_ms} ms per new session")
+    print(f"new connection per message: {unpooled:.2f}s ({args.messages / unpooled:.0f} msg/s)")
+    print(f"pooled connections:         {pooled:.2f}s ({args.messages / pooled:.0f} msg/s)")
+    print(f"pool stats: {smtp_pool.stats()}")
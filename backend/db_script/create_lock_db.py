@@ -1,18 +1,6 @@
-import sqlite3
+from backend.services import booking_db
 
-# Connect to (or create) the SQLite DB
-conn = sqlite3.connect("calendar_booking.db")
-cursor = conn.cursor()
-
-# Create the locked_slots table
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS locked_slots (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    slot_start_time TEXT UNIQUE
-)
-""")
-
-conn.commit()
-conn.close()
+# locked_slots lives in the booking database and is created by its migrations
+booking_db.migrate()
 
 print("✅ locked_slots table created successfully.")
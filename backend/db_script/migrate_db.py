@@ -0,0 +1,49 @@
+"""
+Inspect or upgrade the booking database schema.
+
+    python -m backend.db_script.migrate_db --status
+    python -m backend.db_script.migrate_db                 # upgrade to latest
+    python -m backend.db_script.migrate_db --db other.db --target 1
+
+The app applies the same migrations at startup; this is for upgrading a
+database ahead of a deploy (e.g. de-duplicating a large candidate_workflow
+table) without starting the server.
+"""
+import argparse
+import os
+from backend.services import booking_db
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=booking_db.DB_PATH, help="SQLite file (default: %(default)s)")
+    parser.add_argument("--target", type=int, default=len(booking_db.MIGRATIONS), help="Schema version to upgrade to")
+    parser.add_argument("--status", action="store_true", help="Show the current schema version and exit")
+    args = parser.parse_args()
+
+    if args.status and not os.path.exists(args.db):
+        print(f"{args.db}: does not exist (latest schema version is {len(booking_db.MIGRATIONS)})")
+        return
+
+    conn = booking_db._open(args.db)
+    try:
+        current = booking_db.schema_version(conn)
+        latest = len(booking_db.MIGRATIONS)
+        if args.status:
+            print(f"{args.db}: schema version {current} of {latest}")
+            return
+        if not 0 <= args.target <= latest:
+            raise SystemExit(f"--target must be between 0 and {latest}")
+        if args.target < current:
+            raise SystemExit(f"{args.db} is at version {current}; downgrades are not supported")
+
+        conn.execute("PRAGMA journal_mode=WAL")
+        applied = booking_db.apply_migrations(conn, args.target)
+        if applied:
+            print(f"{args.db}: applied {', '.join(str(v) for v in applied)}; now at version {applied[-1]}")
+        else:
+            print(f"{args.db}: already at version {current}")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
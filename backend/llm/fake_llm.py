@@ -0,0 +1,63 @@
+import asyncio
+import json
+import re
+import time
+from typing import Any, List, Optional
+from langchain_core.language_models.llms import LLM
+
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9+#.]{1,}")
+
+
+def _section(prompt: str, start: str, end: Optional[str] = None) -> str:
+    if start not in prompt:
+        return ""
+    text = prompt.split(start, 1)[1]
+    if end and end in text:
+        text = text.split(end, 1)[0]
+    return text
+
+
+class FakeScoringLLM(LLM):
+    """
+    Offline stand-in for Gemini (LLM_BACKEND=fake).
+    Scores a resume by keyword overlap with the job description and sleeps
+    latency_ms per call, so batch throughput can be benchmarked without
+    network access or API quota.
+    """
+
+    latency_ms: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-scoring-llm"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Any = None, **kwargs: Any) -> str:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return self._respond(prompt)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Any = None, **kwargs: Any) -> str:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return self._respond(prompt)
+
+    def _respond(self, prompt: str) -> str:
+        resume = _section(prompt, "Resume:", "Job Description:")
+        job_description = _section(prompt, "Job Description:", "Respond in")
+        if not resume or not job_description:
+            return "This is a placeholder response from the offline fake LLM."
+
+        resume_words = set(WORD_PATTERN.findall(resume.lower()))
+        jd_words = set(WORD_PATTERN.findall(job_description.lower()))
+        matched = sorted(resume_words & jd_words)
+        missing = sorted(jd_words - resume_words)
+        score = round(100 * len(matched) / len(jd_words)) if jd_words else 0
+
+        return json.dumps({
+            "score": score,
+            "justification": f"The resume shares {len(matched)} of {len(jd_words)} job description keywords.",
+            "matched_skills": matched[:20],
+            "missing_skills": missing[:20],
+        })
@@ -0,0 +1,34 @@
+import os
+from backend.utils.sqlite_cache import SQLiteCache, content_hash
+
+LLM_CACHE_DB_PATH = os.getenv("LLM_CACHE_DB_PATH", "db/llm_cache.db")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+
+llm_cache = SQLiteCache(
+    LLM_CACHE_DB_PATH,
+    table="llm_responses",
+    ttl_seconds=LLM_CACHE_TTL_SECONDS,
+    max_entries=LLM_CACHE_MAX_ENTRIES,
+)
+
+
+def make_cache_key(prompt_text: str, model: str, temperature: float) -> str:
+    """Content address of an LLM call: rendered prompt + model + temperature"""
+    return content_hash(prompt_text, model, repr(float(temperature)))
+
+
+def get_cached_response(key: str):
+    if not LLM_CACHE_ENABLED:
+        return None
+    return llm_cache.get(key)
+
+
+def store_response(key: str, response: str):
+    if LLM_CACHE_ENABLED:
+        llm_cache.set(key, response)
+
+
+def llm_cache_stats() -> dict:
+    return {"enabled": LLM_CACHE_ENABLED, **llm_cache.stats()}
@@ -1,18 +1,107 @@
+import asyncio
 import os
+import threading
+from typing import Callable, Optional
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
+from backend.llm.fake_llm import FakeScoringLLM
+from backend.llm.llm_cache import make_cache_key, get_cached_response, store_response
 
 load_dotenv()  # Load from .env
 
+# LLM_BACKEND=fake swaps Gemini for a local keyword-overlap scorer (offline benchmarks)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+MODEL_NAME = "fake-scoring-llm" if LLM_BACKEND == "fake" else "gemini-2.5-flash"
+TEMPERATURE = 0.7
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+
+_llm = None
+_chains = {}
+_registry_lock = threading.RLock()  # get_chain builds the LLM while holding it
+_llm_semaphore = None
+
 def get_llm():
-    return ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0.7)
+    """
+    Process-wide Gemini client. The client keeps its transport channel open,
+    so sharing one instance reuses pooled connections instead of paying a
+    new TLS handshake on every request.
+    """
+    global _llm
+    if _llm is None:
+        with _registry_lock:
+            if _llm is None:
+                if LLM_BACKEND == "fake":
+                    _llm = FakeScoringLLM(latency_ms=int(os.getenv("FAKE_LLM_LATENCY_MS", "0")))
+                else:
+                    _llm = ChatGoogleGenerativeAI(model=MODEL_NAME, temperature=TEMPERATURE)
+    return _llm
+
+def _is_valid(result: str, validate: Optional[Callable[[str], object]]) -> bool:
+    if validate is None:
+        return True
+    try:
+        validate(result)
+        return True
+    except Exception:
+        return False
+
+def run_chain(chain: LLMChain, inputs: dict, use_cache: bool = True,
+              validate: Optional[Callable[[str], object]] = None) -> str:
+    """
+    Run an LLM chain through the response cache.
+    The cache key is the rendered prompt plus model name and temperature, so
+    the same resume/JD pair is only sent to Gemini once. use_cache=False
+    skips the lookup but still refreshes the stored response. validate (which
+    raises on a bad reply) keeps malformed replies out of the cache: they are
+    never stored, and a cached one that fails it counts as a miss.
+    """
+    prompt_text = chain.prompt.format(**inputs)
+    key = make_cache_key(prompt_text, MODEL_NAME, TEMPERATURE)
+
+    if use_cache:
+        cached = get_cached_response(key)
+        if cached is not None and _is_valid(cached, validate):
+            return cached
+
+    result = chain.run(inputs)
+    if _is_valid(result, validate):
+        store_response(key, result)
+    return result
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
 
-def get_job_description_chain():
-    prompt = PromptTemplate(
-        input_variables=["job_title", "department", "responsibilities", "skills_required", "location", "experience_level"],
-        template="""
+async def arun_chain(chain: LLMChain, inputs: dict, use_cache: bool = True,
+                     validate: Optional[Callable[[str], object]] = None) -> str:
+    """
+    Async counterpart of run_chain: awaits the LLM natively (ainvoke) so a slow
+    Gemini call never blocks the event loop. At most LLM_MAX_CONCURRENCY calls
+    are in flight per process.
+    """
+    prompt_text = chain.prompt.format(**inputs)
+    key = make_cache_key(prompt_text, MODEL_NAME, TEMPERATURE)
+
+    if use_cache:
+        cached = await asyncio.to_thread(get_cached_response, key)
+        if cached is not None and _is_valid(cached, validate):
+            return cached
+
+    async with _get_llm_semaphore():
+        output = await chain.ainvoke(inputs)
+    result = output[chain.output_key]
+
+    if _is_valid(result, validate):
+        await asyncio.to_thread(store_response, key, result)
+    return result
+
+JOB_DESCRIPTION_PROMPT = PromptTemplate(
+    input_variables=["job_title", "department", "responsibilities", "skills_required", "location", "experience_level"],
+    template="""
 Generate a clear, inclusive, and engaging job description using the following information:
 
 - Job Title: {job_title}
@@ -28,6 +117,86 @@ Required Skills:
 
 Use professional language, optimize for SEO, and reflect a modern company tone.
 """
-    )
+)
+
+CANDIDATE_SCORE_PROMPT = PromptTemplate(
+    input_variables=["resume_text", "job_description"],
+    template="""
+You're an AI hiring assistant. Given the following candidate resume and job description, score the candidate's suitability for the job on a scale of 0 to 100.
+
+Also, provide a 2-3 sentence justification explaining why the score was given, and list which of the job's required skills the candidate has and which are missing.
+
+Resume:
+{resume_text}
+
+Job Description:
+{job_description}
+
+Respond in JSON only, with no markdown fences or extra text, exactly matching:
+{{"score": <integer 0-100>, "justification": "<text>", "matched_skills": ["<skill>", ...], "missing_skills": ["<skill>", ...]}}
+"""
+)
+
+PERSONA_PROMPT = PromptTemplate(
+    input_variables=["resume_text"],
+    template="""
+You're an AI hiring assistant. Given the following resume text, generate a structured candidate persona summary.
+
+Include:
+- Name (if identifiable)
+- Profession / Title
+- Years of experience
+- Key skills and technologies
+- Personality traits or strengths
+- Suggested/ideal roles
+
+Resume:
+{resume_text}
+
+Respond in clean markdown format.
+"""
+)
+
+PROMPTS = {
+    "job_description": JOB_DESCRIPTION_PROMPT,
+    "candidate_score": CANDIDATE_SCORE_PROMPT,
+    "persona": PERSONA_PROMPT,
+}
+
+def get_chain(name: str) -> LLMChain:
+    """
+    Return the pre-built chain for a prompt type, building it on first use.
+    Chains hold no per-call state, so one instance is shared by all requests.
+    """
+    chain = _chains.get(name)
+    if chain is None:
+        with _registry_lock:
+            chain = _chains.get(name)
+            if chain is None:
+                chain = LLMChain(llm=get_llm(), prompt=PROMPTS[name])
+                _chains[name] = chain
+    return chain
+
+def get_job_description_chain() -> LLMChain:
+    return get_chain("job_description")
+
+def get_candidate_score_chain() -> LLMChain:
+    return get_chain("candidate_score")
+
+def get_persona_chain() -> LLMChain:
+    return get_chain("persona")
+
+def warm_up_llm():
+    """
+    Build the client and every chain up front (called on FastAPI startup).
+    With LLM_WARMUP_PING=true a tiny request is also sent so the first real
+    request does not pay for connection setup.
+    """
+    for name in PROMPTS:
+        get_chain(name)
 
-    return LLMChain(llm=get_llm(), prompt=prompt)
+    if os.getenv("LLM_WARMUP_PING", "false").lower() == "true":
+        try:
+            get_llm().invoke("ping")
+        except Exception as e:
+            print(f"[LLM] Warm-up ping failed: {e}")
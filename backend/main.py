@@ -1,6 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.routers import job_description, candidate_score, persona_builder, scheduler, slot_router, complete_workflow_router
+from backend.llm.llm_setup import warm_up_llm
+from backend.services import booking_db, email_outbox, inbound_mail
+from backend.utils.email_templates import load_templates
+from backend.utils.upload_reader import RequestSizeLimitMiddleware
+from backend.routers import job_description, candidate_score, persona_builder, scheduler, slot_router, complete_workflow_router, metrics, candidate_match
 
 app = FastAPI()
 
@@ -12,6 +16,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cap upload request bodies while they stream in; the batch endpoint takes many files
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    limits={"/score_candidates/batch": candidate_score.BATCH_MAX_REQUEST_BYTES},
+)
+
+@app.on_event("startup")
+def startup():
+    booking_db.migrate()
+    load_templates()
+    email_outbox.start_workers()
+    inbound_mail.start_poller()
+    warm_up_llm()
+
+@app.on_event("shutdown")
+def shutdown():
+    inbound_mail.stop_poller()
+    email_outbox.stop_workers()
+
 # ✅ Register the route
 app.include_router(job_description.router)
 app.include_router(candidate_score.router)
@@ -19,4 +42,6 @@ app.include_router(persona_builder.router)
 app.include_router(scheduler.router, prefix="/scheduler", tags=["Scheduler"])
 app.include_router(slot_router.router)
 app.include_router(complete_workflow_router.router)
+app.include_router(candidate_match.router)
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
 
@@ -1,5 +1,12 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
 
 class CandidateScoreRequest(BaseModel):
     resume_text: str
     job_description: str
+
+class CandidateScoreResult(BaseModel):
+    score: int = Field(..., ge=0, le=100)
+    justification: str
+    matched_skills: List[str] = []
+    missing_skills: List[str] = []
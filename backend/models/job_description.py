@@ -7,3 +7,4 @@ class JobDescriptionRequest(BaseModel):
     skills_required: str
     location: str
     experience_level: str
+    use_cache: bool = True
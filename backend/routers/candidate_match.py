@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException, Query
+from backend.services.candidate_index_service import candidate_index
+import asyncio
+import time
+
+router = APIRouter()
+
+def _search(jd: str, top_n: int):
+    return candidate_index.search(jd, top_n), len(candidate_index)
+
+@router.get("/match_candidates")
+async def match_candidates(jd: str = Query(..., min_length=1), top_n: int = Query(10, ge=1, le=500)):
+    """
+    Return the indexed candidates closest to a job description.
+    Pure local vector search over every resume ever ingested; no LLM call.
+    """
+    start = time.perf_counter()
+    matches, indexed = await asyncio.to_thread(_search, jd, top_n)
+    return {
+        "matches": matches,
+        "indexed_candidates": indexed,
+        "took_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
+
+@router.delete("/match_candidates/{candidate_id}")
+async def remove_candidate(candidate_id: str):
+    if not await asyncio.to_thread(candidate_index.delete, candidate_id):
+        raise HTTPException(status_code=404, detail="Candidate not found in index")
+    return {"message": f"Candidate {candidate_id} removed from index"}
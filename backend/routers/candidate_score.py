@@ -1,33 +1,135 @@
-from fastapi import APIRouter, UploadFile, File, Form
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
-from backend.utils.pdf_loader_tool import load_pdf_text
-from backend.services.candidate_score_service import score_candidate_match
+from typing import List, Optional
+from backend.utils.pdf_loader_tool import aload_pdf_text_from_bytes, extract_pdf_item, pdf_executor
+from backend.utils.upload_reader import read_upload, MAX_UPLOAD_BYTES
+from backend.utils.resume_text_cache import resume_sha256
+from backend.services.candidate_index_service import index_resumes
+from backend.services.candidate_score_service import ascore_candidate_match, score_candidates_batch, BATCH_MAX_CONCURRENCY
+import asyncio
+import io
 import os
+import zipfile
 
 router = APIRouter()
 
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "1000"))
+BATCH_MAX_ARCHIVE_BYTES = int(os.getenv("BATCH_MAX_ARCHIVE_BYTES", str(500 * 1024 * 1024)))
+# Total size of the PDFs once unpacked from an archive
+BATCH_MAX_UNCOMPRESSED_BYTES = int(os.getenv("BATCH_MAX_UNCOMPRESSED_BYTES", str(1024 * 1024 * 1024)))
+# Whole batch request body (uploaded PDFs + archive), checked while it streams in
+BATCH_MAX_REQUEST_BYTES = int(os.getenv("BATCH_MAX_REQUEST_BYTES", str(BATCH_MAX_ARCHIVE_BYTES + 100 * 1024 * 1024)))
+
 @router.post("/score_candidate")
 async def score_candidate(
     resume: UploadFile = File(...),
-    job_description: str = Form(...)
+    job_description: str = Form(...),
+    use_cache: bool = Form(True)
+):
+    try:
+        content = await read_upload(resume)
+
+        # Extract resume text from PDF on the bounded PDF pool
+        resume_text = await aload_pdf_text_from_bytes(content)
+        await asyncio.to_thread(index_resumes, [(resume_sha256(content), resume_text, {"filename": resume.filename})])
+
+        # Score using Gemini without blocking the event loop
+        result = await ascore_candidate_match(resume_text=resume_text, job_description=job_description, use_cache=use_cache)
+
+        return JSONResponse(content=result.model_dump())
+
+    except HTTPException as e:
+        return JSONResponse(content={"error": e.detail}, status_code=e.status_code)
+    except Exception as e:
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+def unpack_pdf_archive(data: bytes, max_files: int = BATCH_MAX_FILES) -> List[tuple]:
+    """
+    Return (filename, bytes) for every PDF inside a zip archive. Member
+    count, per-file size and total uncompressed size are checked against
+    the limits before anything is decompressed (zipfile never inflates a
+    member past its declared size).
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(".pdf")
+        ]
+        if len(members) > max_files:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Archive holds {len(members)} PDFs but only {max_files} more resumes fit in the batch "
+                       f"(at most {BATCH_MAX_FILES} per batch)"
+            )
+        for info in members:
+            if info.file_size > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail=f"{info.filename} exceeds the {MAX_UPLOAD_BYTES} byte upload limit")
+        if sum(info.file_size for info in members) > BATCH_MAX_UNCOMPRESSED_BYTES:
+            raise HTTPException(status_code=413, detail=f"Archive unpacks to more than {BATCH_MAX_UNCOMPRESSED_BYTES} bytes")
+        return [(os.path.basename(info.filename), archive.read(info)) for info in members]
+
+@router.post("/score_candidates/batch")
+async def score_candidates_batch_endpoint(
+    job_description: str = Form(...),
+    resumes: List[UploadFile] = File(default=[]),
+    archive: Optional[UploadFile] = File(None),
+    max_concurrency: int = Form(BATCH_MAX_CONCURRENCY),
+    use_cache: bool = Form(True),
+    shortlist_top_k: int = Form(0)
 ):
+    """
+    Score many resume PDFs (and/or a zip of PDFs) against one job description.
+    Returns a ranked list; files that fail carry a per-item error instead of
+    failing the whole batch. shortlist_top_k > 0 sends only the K resumes most
+    similar to the JD (local TF-IDF) to the LLM.
+    """
     try:
-        temp_path = f"temp_uploads/{resume.filename}"
+        if len(resumes) > BATCH_MAX_FILES:
+            return JSONResponse(content={"error": f"At most {BATCH_MAX_FILES} resumes per batch"}, status_code=400)
 
-        # Save uploaded file to disk
-        with open(temp_path, "wb") as f:
-            f.write(await resume.read())
+        loop = asyncio.get_running_loop()
+        files = [(resume.filename, await read_upload(resume)) for resume in resumes]
+        if archive is not None:
+            archive_data = await read_upload(archive, max_bytes=BATCH_MAX_ARCHIVE_BYTES)
+            files.extend(await loop.run_in_executor(
+                pdf_executor, unpack_pdf_archive, archive_data, BATCH_MAX_FILES - len(files)
+            ))
 
-        # Extract resume text from PDF
-        resume_text = load_pdf_text(temp_path)
+        if not files:
+            return JSONResponse(content={"error": "No resumes provided"}, status_code=400)
 
-        # Score using Gemini
-        result = score_candidate_match(resume_text=resume_text, job_description=job_description)
+        # Text extraction runs on the shared PDF worker pool
+        extracted = await asyncio.gather(*(
+            loop.run_in_executor(pdf_executor, extract_pdf_item, filename, data)
+            for filename, data in files
+        ))
+        await asyncio.to_thread(index_resumes, [
+            (resume_sha256(data), text, {"filename": filename})
+            for (filename, data), (_, text, error) in zip(files, extracted) if not error
+        ])
+        items = [
+            {"filename": filename, "resume_text": text, "error": error}
+            for filename, text, error in extracted
+        ]
 
-        # Clean up temp file
-        os.remove(temp_path)
+        results = await score_candidates_batch(
+            items, job_description, max_concurrency=max_concurrency, use_cache=use_cache,
+            shortlist_top_k=shortlist_top_k
+        )
 
-        return JSONResponse(content={"score": result})
+        failed = sum(1 for r in results if r["error"])
+        scored = sum(1 for r in results if r["score"] is not None)
+        return JSONResponse(content={
+            "total": len(results),
+            "scored": scored,
+            "failed": failed,
+            "skipped_by_prefilter": len(results) - scored - failed,
+            "results": results
+        })
 
+    except HTTPException as e:
+        return JSONResponse(content={"error": e.detail}, status_code=e.status_code)
+    except zipfile.BadZipFile:
+        return JSONResponse(content={"error": "Archive is not a valid zip file"}, status_code=400)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
@@ -1,15 +1,20 @@
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional
 from datetime import datetime, date
 from backend.services.calendar_service import get_available_slots, book_slot
-from backend.services.lock_service import lock_slot, is_slot_locked
+from backend.services.lock_service import alock_slot
 from backend.services.email_workflow_service import EmailWorkflowService
+from backend.services import booking_db, inbound_mail
+import asyncio
+import uuid
 
 router = APIRouter()
 workflow_service = EmailWorkflowService()
 
+BULK_SHORTLIST_MAX_CANDIDATES = 1000
+
 # Pydantic Models
 class ShortlistRequest(BaseModel):
     candidate_email: EmailStr
@@ -34,31 +39,74 @@ async def shortlist_candidate(request: ShortlistRequest):
     Send shortlisting email to candidate asking for availability
     """
     try:
-        # Store candidate in workflow
-        workflow_service.store_candidate_workflow(
-            candidate_email=request.candidate_email,
-            candidate_name=request.candidate_name,
-            job_title=request.job_title,
-            score=request.score,
-            status="shortlisted"
-        )
-        
-        # Send shortlisting email
-        success = workflow_service.send_shortlisting_email(
+        # Store candidate in workflow and queue the shortlisting email
+        status = await booking_db.arun(
+            workflow_service.shortlist_candidate,
             candidate_email=request.candidate_email,
             candidate_name=request.candidate_name,
             job_title=request.job_title,
             score=request.score
         )
         
-        if success:
-            return {"message": f"Shortlisting email sent to {request.candidate_email}"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to send email")
+        if status == "skipped":
+            return {"message": f"{request.candidate_email} is already past shortlisting for {request.job_title}", "status": status}
+        return {"message": f"Shortlisting email queued for {request.candidate_email}", "status": status}
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class BulkShortlistCandidate(BaseModel):
+    candidate_email: EmailStr
+    candidate_name: str
+    score: int
+
+class BulkShortlistRequest(BaseModel):
+    job_title: str
+    candidates: List[BulkShortlistCandidate] = Field(..., min_length=1, max_length=BULK_SHORTLIST_MAX_CANDIDATES)
+    # Re-using a campaign id makes a retried request skip candidates already queued
+    campaign_id: Optional[str] = Field(None, pattern=r"^[A-Za-z0-9_-]{1,64}$")
+    rate_per_second: float = Field(0, ge=0, description="Spread first delivery attempts to this rate (0 = as fast as the outbox allows)")
+
+# Step 1 (bulk): Shortlist a whole req in one call
+@router.post("/shortlist-candidates/bulk")
+async def shortlist_candidates_bulk(request: BulkShortlistRequest):
+    """
+    Shortlist many candidates for one job: all workflow rows and emails are
+    written in one transaction and delivered by the outbox workers. Returns
+    the per-candidate queueing result; poll /shortlist-campaigns/{campaign_id}
+    for delivery progress.
+    """
+    campaign_id = request.campaign_id or uuid.uuid4().hex[:12]
+    try:
+        results = await booking_db.arun(
+            workflow_service.shortlist_candidates_bulk,
+            [c.model_dump() for c in request.candidates],
+            request.job_title, campaign_id, request.rate_per_second
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "campaign_id": campaign_id,
+        "total": len(results),
+        "queued": sum(1 for r in results if r["status"] == "queued"),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "results": results
+    }
+
+@router.get("/shortlist-campaigns/{campaign_id}")
+async def get_shortlist_campaign(campaign_id: str):
+    """Delivery status (pending, sending, sent, dead) per candidate in a bulk shortlist"""
+    progress = await booking_db.arun(workflow_service.get_campaign_progress, campaign_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    counts = {}
+    for entry in progress:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return {"campaign_id": campaign_id, "total": len(progress), "by_status": counts, "candidates": progress}
+
 # Step 2: Handle availability response and send slots
 @router.post("/send-available-slots")
 async def send_available_slots(request: AvailabilityRequest):
@@ -67,41 +115,48 @@ async def send_available_slots(request: AvailabilityRequest):
     """
     try:
         # Get candidate workflow info
-        candidate_info = workflow_service.get_candidate_workflow(request.candidate_email)
+        candidate_info = await workflow_service.aget_candidate_workflow(request.candidate_email)
         if not candidate_info:
             raise HTTPException(status_code=404, detail="Candidate not found in workflow")
         
-        # Get available slots for the date
-        available_slots = get_available_slots(request.availability_date)
-        
-        if not available_slots:
-            return {"message": "No slots available for the selected date"}
-        
-        # Send top 5 slots
-        top_slots = available_slots[:5]
-        success = workflow_service.send_slot_selection_email(
-            candidate_email=request.candidate_email,
-            candidate_name=candidate_info['candidate_name'],
-            interview_date=request.availability_date,
-            slots=top_slots
+        # Email the top slots for the date and remember them for a numbered reply
+        slots_sent = await booking_db.arun(
+            workflow_service.offer_interview_slots, candidate_info, request.availability_date
         )
+        if not slots_sent:
+            return {"message": "No slots available for the selected date"}
         
-        if success:
-            # Update candidate status
-            workflow_service.update_candidate_status(
-                candidate_email=request.candidate_email,
-                status="slots_sent"
-            )
-            return {
-                "message": f"Available slots sent to {request.candidate_email}",
-                "slots_sent": len(top_slots)
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to send slots email")
+        return {
+            "message": f"Available slots queued for {request.candidate_email}",
+            "slots_sent": len(slots_sent)
+        }
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Steps 2 and 3 from email: candidate replies read from the inbound mailbox
+@router.post("/inbound-replies/poll")
+async def poll_inbound_replies():
+    """
+    Process the next batch of new replies in INBOUND_MAILBOX now (the
+    background poller does the same every INBOUND_POLL_SECONDS): dates get
+    slots emailed, slot numbers get booked and confirmed.
+    """
+    source = inbound_mail.open_source()
+    if source is None:
+        raise HTTPException(status_code=400, detail="INBOUND_MAILBOX is not configured")
+    try:
+        batch = await booking_db.arun(inbound_mail.poll_once, source)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    counts = {}
+    for result in batch["results"]:
+        counts[result["outcome"]] = counts.get(result["outcome"], 0) + 1
+    return {"read": batch["read"], "outcomes": counts, "results": batch["results"]}
+
 # Step 3: Direct slot booking via URL (for email links)
 @router.get("/book-slot")
 async def book_slot_via_url(
@@ -113,8 +168,8 @@ async def book_slot_via_url(
     Book slot directly via URL (called from email links)
     """
     try:
-        # Check if slot is still available
-        if is_slot_locked(slot):
+        # Lock the slot (atomic: exactly one concurrent booker wins)
+        if not await alock_slot(slot):
             return HTMLResponse(content="""
             <html>
                 <body style="font-family: Arial, sans-serif; padding: 20px;">
@@ -125,20 +180,10 @@ async def book_slot_via_url(
             </html>
             """, status_code=409)
         
-        # Lock the slot
-        if not lock_slot(slot):
-            return HTMLResponse(content="""
-            <html>
-                <body style="font-family: Arial, sans-serif; padding: 20px;">
-                    <h2 style="color: #d32f2f;">❌ Slot Unavailable</h2>
-                    <p>This slot is no longer available. Please try another slot.</p>
-                </body>
-            </html>
-            """, status_code=409)
-        
         # Book in Google Calendar
         try:
-            meet_link = book_slot(
+            meet_link = await asyncio.to_thread(
+                book_slot,
                 candidate_name=name,
                 candidate_email=email,
                 start_time_str=slot
@@ -147,16 +192,18 @@ async def book_slot_via_url(
             raise HTTPException(status_code=500, detail=f"Calendar booking failed: {str(e)}")
         
         # Send confirmation email
-        success = workflow_service.send_confirmation_email(
+        success = await booking_db.arun(
+            workflow_service.send_confirmation_email,
             candidate_email=email,
             candidate_name=name,
             slot_time=slot,
-            meet_link=meet_link
+            meet_link=meet_link,
+            dedup_key=f"confirmation:{email}:{slot}"
         )
         
         if success:
             # Update candidate status
-            workflow_service.update_candidate_status(
+            await workflow_service.aupdate_candidate_status(
                 candidate_email=email,
                 status="interview_scheduled"
             )
@@ -195,31 +242,30 @@ async def confirm_interview_slot(request: SlotBookingRequest):
     Confirm interview slot booking via API
     """
     try:
-        # Check if slot is available
-        if is_slot_locked(request.slot_time):
+        # Lock the slot (atomic: exactly one concurrent booker wins)
+        if not await alock_slot(request.slot_time):
             raise HTTPException(status_code=409, detail="Slot already booked")
         
-        # Lock the slot
-        if not lock_slot(request.slot_time):
-            raise HTTPException(status_code=409, detail="Failed to lock slot")
-        
         # Book in Google Calendar
-        meet_link = book_slot(
+        meet_link = await asyncio.to_thread(
+            book_slot,
             candidate_name=request.candidate_name,
             candidate_email=request.candidate_email,
             start_time_str=request.slot_time
         )
         
         # Send confirmation email
-        success = workflow_service.send_confirmation_email(
+        success = await booking_db.arun(
+            workflow_service.send_confirmation_email,
             candidate_email=request.candidate_email,
             candidate_name=request.candidate_name,
             slot_time=request.slot_time,
-            meet_link=meet_link
+            meet_link=meet_link,
+            dedup_key=f"confirmation:{request.candidate_email}:{request.slot_time}"
         )
         
         if success:
-            workflow_service.update_candidate_status(
+            await workflow_service.aupdate_candidate_status(
                 candidate_email=request.candidate_email,
                 status="interview_scheduled"
             )
@@ -231,6 +277,8 @@ async def confirm_interview_slot(request: SlotBookingRequest):
             "slot_time": request.slot_time
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -240,7 +288,7 @@ async def get_candidate_status(email: EmailStr):
     """
     Get candidate workflow status
     """
-    candidate_info = workflow_service.get_candidate_workflow(email)
+    candidate_info = await workflow_service.aget_candidate_workflow(email)
     if not candidate_info:
         raise HTTPException(status_code=404, detail="Candidate not found")
     
@@ -252,7 +300,7 @@ async def get_available_slots_for_date(date: str):
     Get available slots for a specific date
     """
     try:
-        slots = get_available_slots(date)
+        slots = await asyncio.to_thread(get_available_slots, date)
         return {"date": date, "available_slots": slots}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -264,31 +312,27 @@ async def trigger_complete_workflow(request: ShortlistRequest):
     Trigger complete workflow for testing - sends shortlisting email
     """
     try:
-        # Store candidate
-        workflow_service.store_candidate_workflow(
-            candidate_email=request.candidate_email,
-            candidate_name=request.candidate_name,
-            job_title=request.job_title,
-            score=request.score,
-            status="shortlisted"
-        )
-        
-        # Send shortlisting email
-        success = workflow_service.send_shortlisting_email(
+        # Store candidate and queue the shortlisting email
+        status = await booking_db.arun(
+            workflow_service.shortlist_candidate,
             candidate_email=request.candidate_email,
             candidate_name=request.candidate_name,
             job_title=request.job_title,
             score=request.score
         )
         
-        if success:
+        if status == "skipped":
             return {
-                "message": "Workflow triggered successfully",
-                "next_step": "Candidate will receive shortlisting email and should reply with availability",
+                "message": "Candidate is already past shortlisting for this job; workflow left unchanged",
+                "status": status,
                 "candidate_email": request.candidate_email
             }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to send email")
+        return {
+            "message": "Workflow triggered successfully",
+            "next_step": "Candidate will receive shortlisting email and should reply with availability",
+            "status": status,
+            "candidate_email": request.candidate_email
+        }
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
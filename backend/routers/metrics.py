@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+from backend.llm.llm_cache import llm_cache_stats
+from backend.utils.resume_text_cache import resume_text_cache_stats
+from backend.services.calendar_service import freebusy_cache_stats
+from backend.utils.smtp_pool import smtp_pool_stats
+from backend.services.email_outbox import outbox_stats
+from backend.services.inbound_mail import inbound_stats
+
+router = APIRouter()
+
+@router.get("/llm_cache")
+def get_llm_cache_metrics():
+    return llm_cache_stats()
+
+@router.get("/resume_text_cache")
+def get_resume_text_cache_metrics():
+    return resume_text_cache_stats()
+
+@router.get("/freebusy_cache")
+def get_freebusy_cache_metrics():
+    return freebusy_cache_stats()
+
+@router.get("/smtp_pool")
+def get_smtp_pool_metrics():
+    return smtp_pool_stats()
+
+@router.get("/email_outbox")
+def get_email_outbox_metrics():
+    return outbox_stats()
+
+@router.get("/inbound_mail")
+def get_inbound_mail_metrics():
+    return inbound_stats()
@@ -1,24 +1,26 @@
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
-from backend.utils.pdf_loader_tool import load_pdf_text
-from backend.services.persona_builder_service import generate_persona_from_resume
-import os
+import asyncio
+from backend.utils.pdf_loader_tool import aload_pdf_text_from_bytes
+from backend.utils.upload_reader import read_upload
+from backend.utils.resume_text_cache import resume_sha256
+from backend.services.candidate_index_service import index_resumes
+from backend.services.persona_builder_service import agenerate_persona_from_resume
 
 router = APIRouter()
 
 @router.post("/generate_persona")
-async def generate_persona(resume: UploadFile = File(...)):
+async def generate_persona(resume: UploadFile = File(...), use_cache: bool = Form(True)):
     try:
-        temp_path = f"temp_uploads/{resume.filename}"
-        with open(temp_path, "wb") as f:
-            f.write(await resume.read())
+        content = await read_upload(resume)
 
-        resume_text = load_pdf_text(temp_path)
-        persona = generate_persona_from_resume(resume_text)
-
-        os.remove(temp_path)
+        resume_text = await aload_pdf_text_from_bytes(content)
+        await asyncio.to_thread(index_resumes, [(resume_sha256(content), resume_text, {"filename": resume.filename})])
+        persona = await agenerate_persona_from_resume(resume_text, use_cache=use_cache)
 
         return JSONResponse(content={"persona": persona})
 
+    except HTTPException as e:
+        return JSONResponse(content={"error": e.detail}, status_code=e.status_code)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
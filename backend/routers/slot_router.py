@@ -1,24 +1,77 @@
-from fastapi import APIRouter, HTTPException
-from backend.services.calendar_service import get_available_slots, get_busy_slots, get_free_slots
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+from fastapi.responses import Response
+from backend.services.calendar_service import get_available_slots, get_available_slots_range, get_calendar_backend, TIMEZONE, CALENDAR_ID
+from backend.services.calendar_backend import LocalCalendarBackend
+from backend.utils.ics_tools import ICSParseError
 from backend.services.confirm_slot_service import confirm_slot
 from backend.services.email_service import send_slot_email, send_confirmation_email
-from backend.services.lock_service import lock_slot
-from backend.services.calendar_service import book_slot
+from backend.services.lock_service import lock_slot, unlock_slot
+from backend.services.calendar_service import book_slot, book_slots_bulk
 from pydantic import BaseModel, EmailStr, Field
 from datetime import date
+from typing import List, Optional
 
 router = APIRouter()
 
-# ✅ Route to fetch raw available slots (optional, for testing)
+AVAILABILITY_MAX_DAYS = 90
+BULK_BOOKING_MAX_ITEMS = 500
+
+# ✅ Availability over a date range for one or more interviewer calendars
 @router.get("/available-slots")
-def available_slots():
+def available_slots(
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    interviewers: Optional[str] = Query(None, description="Comma-separated calendar ids"),
+    min_free: Optional[int] = Query(None, ge=1, description="Interviewers that must be free (default: all)")
+):
+    """
+    Slots per day where all (or min_free) of the interviewers are free.
+    Uses a single freebusy query for the whole range and every calendar.
+    Defaults to today and the primary calendar.
+    """
+    from_date = from_date or date.today()
+    to_date = to_date or from_date
+    calendar_ids = [c.strip() for c in interviewers.split(",") if c.strip()] if interviewers else None
+    if (to_date - from_date).days >= AVAILABILITY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {AVAILABILITY_MAX_DAYS} days")
+
     try:
-        busy = get_busy_slots()
-        free = get_free_slots(busy)
-        return {"available_slots": free}
+        days = get_available_slots_range(
+            from_date.strftime("%Y-%m-%d"), to_date.strftime("%Y-%m-%d"),
+            calendar_ids=calendar_ids, min_free=min_free
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print("Error:", e)
-        return {"available_slots": []}
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "from": from_date.isoformat(),
+        "to": to_date.isoformat(),
+        "interviewers": calendar_ids or [CALENDAR_ID],
+        "available_slots": days
+    }
+
+# ✅ ICS import/export for the local calendar backend (CALENDAR_BACKEND=local)
+def _local_backend() -> LocalCalendarBackend:
+    backend = get_calendar_backend()
+    if not isinstance(backend, LocalCalendarBackend):
+        raise HTTPException(status_code=400, detail="ICS import/export needs CALENDAR_BACKEND=local")
+    return backend
+
+@router.post("/local-calendar/{calendar_id}/import")
+async def import_local_calendar(calendar_id: str, file: UploadFile = File(...)):
+    backend = _local_backend()
+    text = (await file.read()).decode("utf-8", errors="replace")
+    try:
+        imported = backend.import_ics(calendar_id, text, default_tz=TIMEZONE)
+    except ICSParseError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid ICS file: {e}")
+    return {"calendar_id": calendar_id, "imported": imported}
+
+@router.get("/local-calendar/{calendar_id}.ics")
+def export_local_calendar(calendar_id: str):
+    return Response(content=_local_backend().export_ics(calendar_id), media_type="text/calendar")
 
 # ✅ Slot email sender
 class SlotRequest(BaseModel):
@@ -37,7 +90,7 @@ def send_interview_slots(req: SlotRequest):
         top_slots = free_slots[:5]  # Send only top 5
         send_slot_email(req.candidate_email, req.candidate_name, top_slots)
 
-        return {"message": f"Email sent to {req.candidate_email} with available slots."}
+        return {"message": f"Email with available slots queued for {req.candidate_email}."}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -77,3 +130,53 @@ def confirm_slot(data: ConfirmSlotRequest):
         raise HTTPException(status_code=500, detail=f"Email sending failed: {str(e)}")
 
     return {"status": "success", "meet_link": meet_link}
+
+# ✅ Bulk booking (e.g. a hiring day)
+class BulkBookingItem(BaseModel):
+    candidate_name: str
+    candidate_email: EmailStr
+    slot_time: str  # ISO format
+
+class BulkBookingRequest(BaseModel):
+    bookings: List[BulkBookingItem] = Field(..., min_length=1, max_length=BULK_BOOKING_MAX_ITEMS)
+
+@router.post("/book-slots/bulk")
+def book_slots_bulk_endpoint(req: BulkBookingRequest):
+    """
+    Lock and book many (candidate, slot) pairs with batched Calendar API
+    calls. Each item succeeds or fails on its own: slots that are already
+    locked come back as "slot_taken", and the lock of any item whose event
+    insert failed is released. Confirmation emails are not sent here.
+    """
+    results = [None] * len(req.bookings)
+    to_book = []
+    for index, item in enumerate(req.bookings):
+        if lock_slot(item.slot_time):
+            to_book.append(index)
+        else:
+            results[index] = {
+                "candidate_email": item.candidate_email, "slot_time": item.slot_time,
+                "status": "slot_taken", "meet_link": None, "event_id": None,
+                "error": "Slot already taken"
+            }
+
+    try:
+        booked = book_slots_bulk([req.bookings[i].model_dump() for i in to_book])
+    except Exception as e:
+        booked = [
+            {"candidate_email": req.bookings[i].candidate_email, "slot_time": req.bookings[i].slot_time,
+             "status": "failed", "meet_link": None, "event_id": None, "error": str(e)}
+            for i in to_book
+        ]
+
+    for index, result in zip(to_book, booked):
+        if result["status"] != "booked":
+            unlock_slot(req.bookings[index].slot_time)
+        results[index] = result
+
+    return {
+        "total": len(results),
+        "booked": sum(1 for r in results if r["status"] == "booked"),
+        "failed": sum(1 for r in results if r["status"] != "booked"),
+        "results": results
+    }
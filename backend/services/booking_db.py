@@ -0,0 +1,235 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Single data-access point for db/calendar_booking.db (slot locks, bookings, candidate workflow)
+DB_PATH = os.getenv("BOOKING_DB_PATH", "db/calendar_booking.db")
+# Seconds a writer waits for another writer's lock before giving up
+DB_BUSY_TIMEOUT = float(os.getenv("BOOKING_DB_BUSY_TIMEOUT", "10"))
+# Threads (and therefore connections) serving the async wrappers
+DB_WORKERS = int(os.getenv("BOOKING_DB_WORKERS", "8"))
+# Per-connection cache of compiled statements; connections live for the
+# thread's lifetime, so repeated queries skip the SQL parse/prepare step
+STATEMENT_CACHE_SIZE = 256
+
+def _unique_candidate_workflow(conn: sqlite3.Connection):
+    """
+    One workflow row per (candidate_email, job_title): keep the newest of
+    any duplicates left by repeated shortlisting, then enforce the key and
+    index the per-candidate "latest workflow" lookup.
+    """
+    removed = conn.execute("""
+        DELETE FROM candidate_workflow WHERE id NOT IN (
+            SELECT MAX(id) FROM candidate_workflow GROUP BY candidate_email, job_title
+        )
+    """).rowcount
+    if removed:
+        print(f"[DB] Removed {removed} duplicate candidate_workflow rows")
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_candidate_workflow_email_job
+        ON candidate_workflow (candidate_email, job_title)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_candidate_workflow_email_created
+        ON candidate_workflow (candidate_email, created_at)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_locked_slots_locked_at ON locked_slots (locked_at)")
+
+# Schema versions, applied in order and recorded in PRAGMA user_version.
+# Each entry is an SQL script or a callable taking the connection; never
+# edit a shipped entry, append a new one.
+MIGRATIONS = [
+    # 1: tables used by lock_service and EmailWorkflowService
+    """
+    CREATE TABLE IF NOT EXISTS locked_slots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        slot_start_time TEXT UNIQUE,
+        locked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS booked_slots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        slot_time TEXT NOT NULL,
+        candidate_email TEXT NOT NULL,
+        candidate_name TEXT NOT NULL,
+        status TEXT NOT NULL CHECK(status IN ('booked', 'pending', 'confirmed')),
+        meet_link TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS candidate_workflow (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        candidate_email TEXT NOT NULL,
+        candidate_name TEXT NOT NULL,
+        job_title TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """,
+    # 2: unique workflow per (candidate, job) and indexed status lookups
+    _unique_candidate_workflow,
+    # 3: outbound email queue (see email_outbox); message is the raw RFC 822 bytes
+    """
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dedup_key TEXT UNIQUE,
+        to_email TEXT NOT NULL,
+        subject TEXT,
+        message BLOB,
+        status TEXT NOT NULL CHECK(status IN ('pending', 'sending', 'sent', 'dead')),
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        sent_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (status, next_attempt_at);
+    CREATE INDEX IF NOT EXISTS idx_email_outbox_sent ON email_outbox (status, sent_at);
+    """,
+    # 4: inbound reply processing (see inbound_mail). offered_slots is the JSON
+    # list of slot start times last emailed, so "slot 2" in a reply can be booked.
+    """
+    ALTER TABLE candidate_workflow ADD COLUMN interview_date TEXT;
+    ALTER TABLE candidate_workflow ADD COLUMN offered_slots TEXT;
+    CREATE TABLE IF NOT EXISTS inbound_checkpoints (
+        source TEXT PRIMARY KEY,
+        position TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS inbound_messages (
+        message_id TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        from_email TEXT,
+        workflow_id INTEGER,
+        outcome TEXT NOT NULL,
+        detail TEXT,
+        processed_at REAL NOT NULL
+    );
+    """,
+    # 5: delivery lease for the outbox: a 'sending' row whose claimed_at is older
+    # than the visibility timeout was abandoned and may be claimed again
+    """
+    ALTER TABLE email_outbox ADD COLUMN claimed_at REAL;
+    UPDATE email_outbox SET claimed_at = 0 WHERE status = 'sending';
+    CREATE INDEX IF NOT EXISTS idx_email_outbox_claimed ON email_outbox (status, claimed_at);
+    """,
+]
+
+_local = threading.local()
+_migrated_paths = set()
+_migrate_lock = threading.Lock()
+db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="booking-db")
+
+def _open(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Autocommit: single statements are their own transaction; use transaction() for more
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT, isolation_level=None,
+                           check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT * 1000)}")
+    # Safe with WAL: a crash can lose the last commits but never corrupts the file
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+def get_connection() -> sqlite3.Connection:
+    """
+    This thread's connection, opened on first use and kept open. Schema
+    migrations are applied before the first connection to a file is handed
+    out, so callers never run DDL.
+    """
+    migrate()
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = _open(DB_PATH)
+        _local.conn, _local.path = conn, DB_PATH
+    return conn
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply_migrations(conn: sqlite3.Connection, target: Optional[int] = None) -> List[int]:
+    """Run pending MIGRATIONS (up to target) on conn; returns the versions applied"""
+    target = len(MIGRATIONS) if target is None else target
+    applied = []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read inside the write lock: another process may have migrated meanwhile
+        for version in range(schema_version(conn) + 1, target + 1):
+            migration = MIGRATIONS[version - 1]
+            if callable(migration):
+                migration(conn)
+            else:
+                for statement in migration.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            applied.append(version)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return applied
+
+def migrate(path: Optional[str] = None) -> List[int]:
+    """
+    Bring the database up to the latest schema and switch it to WAL mode.
+    Runs once per file per process (app startup calls it; anything else
+    triggers it lazily through get_connection).
+    """
+    path = path or DB_PATH
+    if path in _migrated_paths:
+        return []
+    with _migrate_lock:
+        if path in _migrated_paths:
+            return []
+        conn = _open(path)
+        try:
+            # WAL is persistent: set once, every later connection inherits it
+            conn.execute("PRAGMA journal_mode=WAL")
+            applied = apply_migrations(conn)
+        finally:
+            conn.close()
+        if applied:
+            print(f"[DB] {path} migrated to schema version {applied[-1]}")
+        _migrated_paths.add(path)
+        return applied
+
+@contextmanager
+def transaction():
+    """Several statements as one atomic write; the write lock is taken up front"""
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def execute(sql: str, params=()) -> sqlite3.Cursor:
+    return get_connection().execute(sql, params)
+
+def fetch_one(sql: str, params=()) -> Optional[Dict]:
+    cursor = get_connection().execute(sql, params)
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([d[0] for d in cursor.description], row))
+
+def fetch_all(sql: str, params=()) -> List[Dict]:
+    cursor = get_connection().execute(sql, params)
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+async def arun(fn, *args, **kwargs):
+    """Run a blocking data-access call on the DB pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, lambda: fn(*args, **kwargs))
@@ -0,0 +1,170 @@
+import abc
+import datetime
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+from backend.services.slot_engine import BusyProvider
+from backend.utils.ics_tools import parse_ics_events, events_to_ics
+
+LOCAL_CALENDAR_DB = os.getenv("LOCAL_CALENDAR_DB", "db/local_calendar.db")
+
+
+class CalendarBackend(BusyProvider):
+    """
+    A calendar that can report busy times and accept new events.
+    Events use the Google Calendar API body shape ("start"/"end" with
+    "dateTime", "attendees", "conferenceData"), and insert_event returns a
+    Google-shaped resource with at least "id" and "hangoutLink".
+    """
+
+    @abc.abstractmethod
+    def insert_event(self, calendar_id: str, event: Dict) -> Dict:
+        """Create one event and return the created resource"""
+
+    def insert_events(self, calendar_id: str, events: List[Dict]) -> List[Tuple[Optional[Dict], Optional[Exception]]]:
+        """(created event, None) or (None, error) per input event, in order"""
+        results = []
+        for event in events:
+            try:
+                results.append((self.insert_event(calendar_id, event), None))
+            except Exception as e:
+                results.append((None, e))
+        return results
+
+
+def _to_datetime(value: Dict) -> datetime.datetime:
+    parsed = datetime.datetime.fromisoformat(value["dateTime"])
+    if parsed.tzinfo is None:
+        raise ValueError(f"Event time {value['dateTime']} has no UTC offset")
+    return parsed
+
+
+class LocalCalendarBackend(CalendarBackend):
+    """
+    Calendar kept in a local SQLite file, for offline runs, CI and load
+    tests. Times are stored as UTC epoch seconds and indexed per calendar,
+    so free/busy is a single range query. Calendars can be seeded from and
+    dumped to .ics files.
+    """
+
+    def __init__(self, db_path: str = LOCAL_CALENDAR_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id TEXT PRIMARY KEY,
+                calendar_id TEXT NOT NULL,
+                start_ts REAL NOT NULL,
+                end_ts REAL NOT NULL,
+                summary TEXT,
+                attendees TEXT,
+                transparent INTEGER NOT NULL DEFAULT 0,
+                meet_link TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_events_calendar_start ON events (calendar_id, start_ts)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_busy(self, calendar_ids, time_min, time_max):
+        conn = self._connection()
+        busy = {}
+        for calendar_id in calendar_ids:
+            rows = conn.execute(
+                """
+                SELECT start_ts, end_ts FROM events
+                WHERE calendar_id = ? AND transparent = 0 AND start_ts < ? AND end_ts > ?
+                ORDER BY start_ts
+                """,
+                (calendar_id, time_max.timestamp(), time_min.timestamp())
+            ).fetchall()
+            busy[calendar_id] = [
+                (datetime.datetime.fromtimestamp(start, time_min.tzinfo),
+                 datetime.datetime.fromtimestamp(end, time_min.tzinfo))
+                for start, end in rows
+            ]
+        return busy
+
+    def _row(self, calendar_id: str, event: Dict) -> Tuple:
+        event_id = uuid.uuid4().hex
+        meet_link = f"https://meet.local/{event_id[:12]}" if event.get("conferenceData") else None
+        attendees = ",".join(a["email"] for a in event.get("attendees", []))
+        return (
+            event_id, calendar_id, _to_datetime(event["start"]).timestamp(), _to_datetime(event["end"]).timestamp(),
+            event.get("summary", ""), attendees, int(event.get("transparency") == "transparent"), meet_link
+        )
+
+    def _resource(self, row: Tuple, event: Dict) -> Dict:
+        return {**event, "id": row[0], "hangoutLink": row[7]} if row[7] else {**event, "id": row[0]}
+
+    def insert_event(self, calendar_id, event):
+        row = self._row(calendar_id, event)
+        conn = self._connection()
+        conn.execute("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+        conn.commit()
+        return self._resource(row, event)
+
+    def insert_events(self, calendar_id, events):
+        """All valid events are written in one transaction"""
+        results, rows = [], []
+        for event in events:
+            try:
+                row = self._row(calendar_id, event)
+                rows.append(row)
+                results.append((self._resource(row, event), None))
+            except Exception as e:
+                results.append((None, e))
+        conn = self._connection()
+        conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        return results
+
+    def import_ics(self, calendar_id: str, text: str, default_tz: str = "UTC") -> int:
+        """Load VEVENTs from .ics text into calendar_id; returns the number imported"""
+        rows = [
+            (e["uid"] or uuid.uuid4().hex, calendar_id, e["start"].timestamp(), e["end"].timestamp(),
+             e["summary"], "", int(e["transparent"]), None)
+            for e in parse_ics_events(text, default_tz)
+        ]
+        conn = self._connection()
+        conn.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        return len(rows)
+
+    def export_ics(self, calendar_id: str) -> str:
+        rows = self._connection().execute(
+            "SELECT id, summary, start_ts, end_ts, transparent FROM events WHERE calendar_id = ? ORDER BY start_ts",
+            (calendar_id,)
+        ).fetchall()
+        return events_to_ics([
+            {
+                "uid": event_id,
+                "summary": summary,
+                "start": datetime.datetime.fromtimestamp(start, datetime.timezone.utc),
+                "end": datetime.datetime.fromtimestamp(end, datetime.timezone.utc),
+                "transparent": bool(transparent),
+            }
+            for event_id, summary, start, end, transparent in rows
+        ])
+
+    def clear(self, calendar_id: Optional[str] = None):
+        conn = self._connection()
+        if calendar_id is None:
+            conn.execute("DELETE FROM events")
+        else:
+            conn.execute("DELETE FROM events WHERE calendar_id = ?", (calendar_id,))
+        conn.commit()
@@ -0,0 +1,87 @@
+import datetime
+import os
+import threading
+import time
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "token.json")
+REFRESH_MARGIN_SECONDS = int(os.getenv("CALENDAR_REFRESH_MARGIN_SECONDS", "300"))
+REFRESH_CHECK_INTERVAL_SECONDS = 60
+
+_credentials = None
+_credentials_lock = threading.Lock()
+_refresher_started = False
+_local = threading.local()
+_service_override = None
+
+def _needs_refresh(creds: Credentials) -> bool:
+    if not creds.valid:
+        return True
+    if creds.expiry is None:
+        return False
+    # google-auth keeps expiry as a naive UTC datetime
+    remaining = creds.expiry - datetime.datetime.utcnow()
+    return remaining.total_seconds() < REFRESH_MARGIN_SECONDS
+
+def _refresh_if_needed():
+    with _credentials_lock:
+        creds = _credentials
+        if creds is None or not creds.refresh_token or not _needs_refresh(creds):
+            return
+        creds.refresh(Request())
+        with open(TOKEN_PATH, "w") as token:
+            token.write(creds.to_json())
+        print("♻️ Google Calendar token refreshed")
+
+def _refresh_loop():
+    while True:
+        time.sleep(REFRESH_CHECK_INTERVAL_SECONDS)
+        try:
+            _refresh_if_needed()
+        except Exception as e:
+            print(f"[CALENDAR] Token refresh failed: {e}")
+
+def get_credentials() -> Credentials:
+    """
+    Load token.json once per process and keep it fresh: a daemon thread
+    refreshes the access token shortly before it expires.
+    """
+    global _credentials, _refresher_started
+    if _credentials is None:
+        with _credentials_lock:
+            if _credentials is None:
+                _credentials = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+        _refresh_if_needed()
+
+    if not _refresher_started:
+        with _credentials_lock:
+            if not _refresher_started:
+                threading.Thread(target=_refresh_loop, name="calendar-token-refresh", daemon=True).start()
+                _refresher_started = True
+
+    return _credentials
+
+def get_calendar_service():
+    """
+    Cached Calendar API client. Built from the bundled (static) discovery
+    document, so no discovery fetch happens at runtime. httplib2 is not
+    thread-safe, so each thread gets its own client around the shared
+    credentials.
+    """
+    if _service_override is not None:
+        return _service_override
+
+    service = getattr(_local, "service", None)
+    if service is None:
+        service = build('calendar', 'v3', credentials=get_credentials(),
+                        static_discovery=True, cache_discovery=False)
+        _local.service = service
+    return service
+
+def set_calendar_service(service):
+    """Swap in a fake calendar service (e.g. for tests); pass None to restore Google"""
+    global _service_override
+    _service_override = service
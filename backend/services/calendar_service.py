@@ -1,144 +1,342 @@
 import datetime
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List
 import pytz
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from backend.services.calendar_client import get_calendar_service
+from backend.services.slot_engine import SlotConfig, SlotEngine, BusyProvider, ICSBusyProvider, parse_busy
+from backend.services.calendar_backend import CalendarBackend, LocalCalendarBackend, LOCAL_CALENDAR_DB
 
 
+# Working hours, slot length, buffers and breaks (SLOT_* env vars)
+slot_config = SlotConfig.from_env()
 
-SCOPES = ['https://www.googleapis.com/auth/calendar']
-TIMEZONE = 'Asia/Kolkata'
+TIMEZONE = slot_config.timezone
 CALENDAR_ID = 'primary'
-SLOT_DURATION = 30  # in minutes
-WORK_HOURS_START = 10
-WORK_HOURS_END = 19
-
-
-
+SLOT_DURATION = slot_config.slot_duration  # in minutes
+WORK_HOURS_START = slot_config.work_start.hour
+WORK_HOURS_END = slot_config.work_end.hour
+# google (default) or local (SQLite file at LOCAL_CALENDAR_DB, no credentials needed)
+CALENDAR_BACKEND = os.getenv("CALENDAR_BACKEND", "google").lower()
+# Busy times from the calendar backend (default) or a read-only .ics file (ics, BUSY_ICS_PATH)
+BUSY_PROVIDER = os.getenv("BUSY_PROVIDER", "backend").lower()
+FREEBUSY_CACHE_TTL_SECONDS = int(os.getenv("FREEBUSY_CACHE_TTL_SECONDS", "60"))
+# Google freebusy limits per query
+FREEBUSY_MAX_CALENDARS = 50
+FREEBUSY_MAX_DAYS = 60
+# Google caps a batch request at 50 calls
+BULK_BOOKING_BATCH_SIZE = min(int(os.getenv("BULK_BOOKING_BATCH_SIZE", "50")), 50)
+
+# (calendar_id, YYYY-MM-DD) -> (fetched_at, busy intervals for the whole day)
+_freebusy_cache = {}
+# calendar_id -> invalidation count; a fetch that started before an
+# invalidation of its calendar must not write its (possibly stale) result
+# back. Per calendar rather than per day so the map stays bounded; the cost is
+# that an in-flight fetch for another day of that calendar is not cached.
+_freebusy_versions = {}
+_freebusy_lock = threading.Lock()
+_freebusy_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_freebusy_pruned_at = 0.0
+
+def _prune_freebusy_cache(now: float):
+    """Drop expired days, at most once per TTL (caller holds _freebusy_lock)"""
+    global _freebusy_pruned_at
+    if now - _freebusy_pruned_at < FREEBUSY_CACHE_TTL_SECONDS:
+        return
+    _freebusy_pruned_at = now
+    for key in [k for k, (fetched_at, _) in _freebusy_cache.items() if now - fetched_at >= FREEBUSY_CACHE_TTL_SECONDS]:
+        del _freebusy_cache[key]
+
+def _day_bounds(date: str):
+    tz = pytz.timezone(TIMEZONE)
+    date_obj = datetime.datetime.strptime(date, "%Y-%m-%d")
+    start = tz.localize(datetime.datetime.combine(date_obj, datetime.time(0, 0)))
+    end = tz.localize(datetime.datetime.combine(date_obj + datetime.timedelta(days=1), datetime.time(0, 0)))
+    return start, end
 
+def _query_freebusy(time_min: datetime.datetime, time_max: datetime.datetime, calendar_ids):
+    """One freebusy round trip for all calendar_ids; returns calendar_id -> busy list"""
+    events_result = get_calendar_service().freebusy().query(
+        body={
+            "timeMin": time_min.isoformat(),
+            "timeMax": time_max.isoformat(),
+            "timeZone": TIMEZONE,
+            "items": [{"id": calendar_id} for calendar_id in calendar_ids]
+        }
+    ).execute()
+    calendars = events_result['calendars']
+    return {calendar_id: calendars.get(calendar_id, {}).get('busy', []) for calendar_id in calendar_ids}
 
+def fetch_busy_times(date: str, calendar_id: str = CALENDAR_ID):
+    """
+    Busy intervals for a whole day, served from a short-TTL in-process cache.
+    Entries are dropped after FREEBUSY_CACHE_TTL_SECONDS or as soon as
+    book_slot writes an event on that day.
+    """
+    key = (calendar_id, date)
+    now = time.monotonic()
+    with _freebusy_lock:
+        entry = _freebusy_cache.get(key)
+        if entry and now - entry[0] < FREEBUSY_CACHE_TTL_SECONDS:
+            _freebusy_stats["hits"] += 1
+            return entry[1]
+        _freebusy_stats["misses"] += 1
+        version = _freebusy_versions.get(calendar_id, 0)
+
+    start_of_day, end_of_day = _day_bounds(date)
+    busy_times = _query_freebusy(start_of_day, end_of_day, [calendar_id])[calendar_id]
+
+    with _freebusy_lock:
+        _prune_freebusy_cache(now)
+        if _freebusy_versions.get(calendar_id, 0) == version:
+            _freebusy_cache[key] = (now, busy_times)
+    return busy_times
 
+def invalidate_freebusy(date: str, calendar_id: str = CALENDAR_ID):
+    key = (calendar_id, date)
+    with _freebusy_lock:
+        _freebusy_versions[calendar_id] = _freebusy_versions.get(calendar_id, 0) + 1
+        if _freebusy_cache.pop(key, None) is not None:
+            _freebusy_stats["invalidations"] += 1
+
+def _date_range(from_date: str, to_date: str):
+    start = datetime.datetime.strptime(from_date, "%Y-%m-%d").date()
+    end = datetime.datetime.strptime(to_date, "%Y-%m-%d").date()
+    if end < start:
+        raise ValueError("'to' date must not be before 'from' date")
+    return [(start + datetime.timedelta(days=i)).strftime("%Y-%m-%d") for i in range((end - start).days + 1)]
+
+def _split_busy_by_day(busy_times, dates):
+    """Clip busy intervals to each day they touch: date -> busy list"""
+    per_day = {date: [] for date in dates}
+    bounds = {date: _day_bounds(date) for date in dates}
+    for busy in busy_times:
+        busy_start = datetime.datetime.fromisoformat(busy['start'])
+        busy_end = datetime.datetime.fromisoformat(busy['end'])
+        for date, (day_start, day_end) in bounds.items():
+            if busy_start < day_end and busy_end > day_start:
+                per_day[date].append({
+                    "start": max(busy_start, day_start).isoformat(),
+                    "end": min(busy_end, day_end).isoformat()
+                })
+    return per_day
+
+def fetch_busy_times_range(from_date: str, to_date: str, calendar_ids):
+    """
+    Busy intervals for several calendars over a date range:
+    calendar_id -> date -> busy list. Whatever is not already cached is fetched
+    in one freebusy query spanning all missing days and calendars (split only
+    past the API's FREEBUSY_MAX_CALENDARS / FREEBUSY_MAX_DAYS limits), and the
+    result is stored per (calendar, day) in the cache.
+    """
+    dates = _date_range(from_date, to_date)
+    now = time.monotonic()
+    result = {calendar_id: {} for calendar_id in calendar_ids}
+    missing_calendars = set()
+    missing_dates = set()
+
+    with _freebusy_lock:
+        for calendar_id in calendar_ids:
+            for date in dates:
+                entry = _freebusy_cache.get((calendar_id, date))
+                if entry and now - entry[0] < FREEBUSY_CACHE_TTL_SECONDS:
+                    _freebusy_stats["hits"] += 1
+                    result[calendar_id][date] = entry[1]
+                else:
+                    _freebusy_stats["misses"] += 1
+                    missing_calendars.add(calendar_id)
+                    missing_dates.add(date)
+        versions = {calendar_id: _freebusy_versions.get(calendar_id, 0) for calendar_id in missing_calendars}
+
+    if missing_calendars:
+        query_dates = [d for d in dates if min(missing_dates) <= d <= max(missing_dates)]
+        calendars = [c for c in calendar_ids if c in missing_calendars]
+        for i in range(0, len(calendars), FREEBUSY_MAX_CALENDARS):
+            calendar_chunk = calendars[i:i + FREEBUSY_MAX_CALENDARS]
+            for j in range(0, len(query_dates), FREEBUSY_MAX_DAYS):
+                date_chunk = query_dates[j:j + FREEBUSY_MAX_DAYS]
+                busy = _query_freebusy(_day_bounds(date_chunk[0])[0], _day_bounds(date_chunk[-1])[1], calendar_chunk)
+                with _freebusy_lock:
+                    _prune_freebusy_cache(now)
+                    for calendar_id in calendar_chunk:
+                        for date, day_busy in _split_busy_by_day(busy[calendar_id], date_chunk).items():
+                            if _freebusy_versions.get(calendar_id, 0) == versions[calendar_id]:
+                                _freebusy_cache[(calendar_id, date)] = (now, day_busy)
+                            result[calendar_id][date] = day_busy
+
+    return result
+
+def freebusy_cache_stats() -> dict:
+    with _freebusy_lock:
+        lookups = _freebusy_stats["hits"] + _freebusy_stats["misses"]
+        return {
+            **_freebusy_stats,
+            "hit_rate": round(_freebusy_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(_freebusy_cache),
+            "ttl_seconds": FREEBUSY_CACHE_TTL_SECONDS,
+        }
 
-# Google Calendar API scope
-SCOPES = ['https://www.googleapis.com/auth/calendar']
+class GoogleCalendarBackend(CalendarBackend):
+    """Google Calendar: freebusy through the per-day cache above, inserts via batch requests"""
+
+    def get_busy(self, calendar_ids, time_min, time_max):
+        tz = pytz.timezone(TIMEZONE)
+        busy = fetch_busy_times_range(
+            time_min.astimezone(tz).strftime("%Y-%m-%d"),
+            time_max.astimezone(tz).strftime("%Y-%m-%d"),
+            calendar_ids
+        )
+        return {
+            calendar_id: [
+                interval for day_busy in busy[calendar_id].values() for interval in parse_busy(day_busy)
+                if interval[0] < time_max and interval[1] > time_min
+            ]
+            for calendar_id in calendar_ids
+        }
 
-def get_calendar_service():
-    creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-    return build('calendar', 'v3', credentials=creds)
+    def insert_event(self, calendar_id, event):
+        return get_calendar_service().events().insert(
+            calendarId=calendar_id,
+            body=event,
+            conferenceDataVersion=1
+        ).execute()
+
+    def insert_events(self, calendar_id, events):
+        """
+        BULK_BOOKING_BATCH_SIZE inserts per HTTP round trip. If a whole
+        batch request fails, every event in it carries that error.
+        """
+        results = [(None, None)] * len(events)
+        service = get_calendar_service()
+
+        def on_response(request_id, response, exception):
+            results[int(request_id)] = (None, exception) if exception is not None else (response, None)
+
+        for chunk_start in range(0, len(events), BULK_BOOKING_BATCH_SIZE):
+            chunk = range(chunk_start, min(chunk_start + BULK_BOOKING_BATCH_SIZE, len(events)))
+            batch = service.new_batch_http_request(callback=on_response)
+            for index in chunk:
+                batch.add(
+                    service.events().insert(calendarId=calendar_id, body=events[index], conferenceDataVersion=1),
+                    request_id=str(index)
+                )
+            try:
+                batch.execute()
+            except Exception as e:
+                for index in chunk:
+                    if results[index] == (None, None):
+                        results[index] = (None, e)
+        return results
+
+_calendar_backend = None
+_slot_engine = None
+
+def get_calendar_backend() -> CalendarBackend:
+    global _calendar_backend
+    if _calendar_backend is None:
+        if CALENDAR_BACKEND == "local":
+            _calendar_backend = LocalCalendarBackend(LOCAL_CALENDAR_DB)
+        else:
+            _calendar_backend = GoogleCalendarBackend()
+    return _calendar_backend
+
+def set_calendar_backend(backend: CalendarBackend):
+    """Swap the calendar used for availability and bookings (Google, local SQLite, ...)"""
+    global _calendar_backend, _slot_engine
+    _calendar_backend = backend
+    _slot_engine = None
+
+def _default_provider() -> BusyProvider:
+    if BUSY_PROVIDER == "ics":
+        return ICSBusyProvider(os.getenv("BUSY_ICS_PATH", "calendar.ics"), default_tz=TIMEZONE)
+    return get_calendar_backend()
+
+def get_slot_engine() -> SlotEngine:
+    global _slot_engine
+    if _slot_engine is None:
+        _slot_engine = SlotEngine(_default_provider(), slot_config)
+    return _slot_engine
+
+def set_busy_provider(provider: BusyProvider):
+    """Read busy times from somewhere else (ICS file, in-memory fake); bookings still go to the backend"""
+    global _slot_engine
+    _slot_engine = SlotEngine(provider, slot_config)
+
+def _engine_for(start_hour=None, end_hour=None, slot_duration=None) -> SlotEngine:
+    engine = get_slot_engine()
+    overrides = {}
+    if start_hour is not None:
+        overrides["work_start"] = datetime.time(start_hour, 0)
+    if end_hour is not None:
+        overrides["work_end"] = datetime.time(end_hour, 0)
+    if slot_duration is not None:
+        overrides["slot_duration"] = slot_duration
+    if not overrides:
+        return engine
+    return SlotEngine(engine.provider, engine.config.model_copy(update=overrides))
+
+def _parse_date(date: str) -> datetime.date:
+    return datetime.datetime.strptime(date, "%Y-%m-%d").date()
+
+def get_available_slots_range(from_date: str, to_date: str, calendar_ids=None, min_free=None,
+                              start_hour=None, end_hour=None, slot_duration=None):
+    """
+    Per-day slots over a date range where at least min_free of the given
+    calendars (default: all of them) are free.
+    :return: {date: [{"start", "end", "free_calendars"}]} with ISO times
+    """
+    days = _engine_for(start_hour, end_hour, slot_duration).available_slots(
+        _parse_date(from_date), _parse_date(to_date), calendar_ids or [CALENDAR_ID], min_free
+    )
+    return {
+        date: [
+            {"start": slot["start"].isoformat(), "end": slot["end"].isoformat(), "free_calendars": slot["free_calendars"]}
+            for slot in slots
+        ]
+        for date, slots in days.items()
+    }
 
 def get_available_slots(date: str, calendar_id='primary',
-                        start_hour=10, end_hour=19, slot_duration=30):
+                        start_hour=None, end_hour=None, slot_duration=None):
     """
     Get available slots for a given day based on working hours and busy times.
     :param date: format YYYY-MM-DD
     :return: List of available datetime ranges
     """
-    service = get_calendar_service()
-    timezone = 'Asia/Kolkata'
-    tz = pytz.timezone(timezone)
-
-    date_obj = datetime.datetime.strptime(date, "%Y-%m-%d")
-    start_of_day = tz.localize(datetime.datetime.combine(date_obj, datetime.time(start_hour, 0)))
-    end_of_day = tz.localize(datetime.datetime.combine(date_obj, datetime.time(end_hour, 0)))
-
-    start_iso = start_of_day.isoformat()
-    #this is a change2
-    end_iso = end_of_day.isoformat()
-
-    # Fetch busy slots from Google Calendar
-    events_result = service.freebusy().query(
-        body={
-            "timeMin": start_iso,
-            "timeMax": end_iso,
-            "timeZone": timezone,
-            "items": [{"id": calendar_id}]
-        }
-    ).execute()
-
-    busy_times = events_result['calendars'][calendar_id]['busy']
-
-    # Generate time slots
-    current = start_of_day
-    available_slots = []
-    while current < end_of_day:
-        slot_end = current + datetime.timedelta(minutes=slot_duration)
-        slot_range = {"start": current, "end": slot_end}
-
-        # Check overlap with busy slots
-        overlap = False
-        for busy in busy_times:
-            busy_start = datetime.datetime.fromisoformat(busy['start'])
-            busy_end = datetime.datetime.fromisoformat(busy['end'])
-
-            if slot_range['start'] < busy_end and slot_range['end'] > busy_start:
-                overlap = True
-                break
-
-        if not overlap:
-            available_slots.append(slot_range)
-
-        current = slot_end
+    day = _parse_date(date)
+    slots = _engine_for(start_hour, end_hour, slot_duration).available_slots(day, day, [calendar_id])[date]
 
     # Format for display
-    formatted_slots = [
+    return [
         f"{slot['start'].strftime('%Y-%m-%d %H:%M')} - {slot['end'].strftime('%H:%M')}"
-        for slot in available_slots
+        for slot in slots
     ]
 
-    return formatted_slots
-
-
-if __name__ == "__main__":
-    today = datetime.date.today().strftime("%Y-%m-%d")
-    slots = get_available_slots(today)
-    print(f"Available slots for {today}:")
-    for s in slots:
-        print("•", s)
-
 def get_busy_slots(date: str):
     """
-    Get busy slots from Google Calendar for a given date.
+    Get busy slots for a given date, clipped to working hours.
     :param date: format YYYY-MM-DD
     :return: List of busy time ranges with 'start' and 'end'
     """
-    service = get_calendar_service()
-    tz = pytz.timezone(TIMEZONE)
-
-    date_obj = datetime.datetime.strptime(date, "%Y-%m-%d")
-    start_of_day = tz.localize(datetime.datetime.combine(date_obj, datetime.time(WORK_HOURS_START, 0)))
-    end_of_day = tz.localize(datetime.datetime.combine(date_obj, datetime.time(WORK_HOURS_END, 0)))
-
-    events_result = service.freebusy().query(
-        body={
-            "timeMin": start_of_day.isoformat(),
-            "timeMax": end_of_day.isoformat(),
-            "timeZone": TIMEZONE,
-            "items": [{"id": CALENDAR_ID}]
-        }
-    ).execute()
-
-    busy_times = events_result['calendars'][CALENDAR_ID]['busy']
-    return busy_times
-
-def book_slot(candidate_name: str, candidate_email: str, start_time_str: str) -> str:
-    from datetime import datetime, timedelta
-    from googleapiclient.discovery import build
-
-    creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-    service = build("calendar", "v3", credentials=creds)
-
-    start_dt = datetime.fromisoformat(start_time_str)
-    end_dt = start_dt + timedelta(minutes=30)
-
-    event = {
+    engine = get_slot_engine()
+    start_of_day, end_of_day = engine.day_window(_parse_date(date))
+    busy = engine.provider.get_busy([CALENDAR_ID], start_of_day, end_of_day)[CALENDAR_ID]
+    return [{"start": start.isoformat(), "end": end.isoformat()} for start, end in busy]
+
+def _interview_event(candidate_name: str, candidate_email: str, start_dt: datetime.datetime, request_id: str) -> dict:
+    end_dt = start_dt + datetime.timedelta(minutes=SLOT_DURATION)
+    return {
         'summary': f'Interview with {candidate_name}',
         'description': f'Interview scheduled with {candidate_name}',
         'start': {
             'dateTime': start_dt.isoformat(),
-            'timeZone': 'Asia/Kolkata',
+            'timeZone': TIMEZONE,
         },
         'end': {
             'dateTime': end_dt.isoformat(),
-            'timeZone': 'Asia/Kolkata',
+            'timeZone': TIMEZONE,
         },
         'attendees': [
             {'email': candidate_email},
@@ -146,22 +344,66 @@ def book_slot(candidate_name: str, candidate_email: str, start_time_str: str) ->
         'conferenceData': {
             'createRequest': {
                 'conferenceSolutionKey': {'type': 'hangoutsMeet'},
-                'requestId': f"meet_{int(start_dt.timestamp())}"
+                'requestId': request_id
             }
         }
     }
 
-    event = service.events().insert(
-        calendarId='primary',
-        body=event,
-        conferenceDataVersion=1
-    ).execute()
+def _booked_date(start_dt: datetime.datetime) -> str:
+    tz = pytz.timezone(TIMEZONE)
+    return (start_dt.astimezone(tz) if start_dt.tzinfo else start_dt).strftime("%Y-%m-%d")
 
-    meet_link = event.get('hangoutLink', 'No link generated')
-    return meet_link
+def book_slot(candidate_name: str, candidate_email: str, start_time_str: str) -> str:
+    start_dt = datetime.datetime.fromisoformat(start_time_str)
+    event = _interview_event(candidate_name, candidate_email, start_dt, f"meet_{int(start_dt.timestamp())}")
 
+    event = get_calendar_backend().insert_event(CALENDAR_ID, event)
 
+    invalidate_freebusy(_booked_date(start_dt))
 
+    meet_link = event.get('hangoutLink', 'No link generated')
+    return meet_link
+
+def book_slots_bulk(bookings: List[Dict]) -> List[Dict]:
+    """
+    Insert many interview events in one go (Google: batch requests of
+    BULK_BOOKING_BATCH_SIZE events per HTTP round trip). bookings are
+    {"candidate_name", "candidate_email", "slot_time"} dicts; returns one
+    result per booking, in order, with status "booked" (plus meet_link and
+    event_id) or "failed" (plus error).
+    """
+    results = [
+        {"candidate_email": b["candidate_email"], "slot_time": b["slot_time"],
+         "status": "failed", "meet_link": None, "event_id": None, "error": None}
+        for b in bookings
+    ]
+    batch_token = uuid.uuid4().hex[:8]
+    events, positions, booked_dates = [], [], set()
+    for index, booking in enumerate(bookings):
+        try:
+            start_dt = datetime.datetime.fromisoformat(booking["slot_time"])
+        except ValueError as e:
+            results[index]["error"] = str(e)
+            continue
+        events.append(_interview_event(
+            booking["candidate_name"], booking["candidate_email"], start_dt,
+            f"meet_{int(start_dt.timestamp())}_{batch_token}_{index}"
+        ))
+        positions.append(index)
+        booked_dates.add(_booked_date(start_dt))
+
+    if events:
+        for index, (event, error) in zip(positions, get_calendar_backend().insert_events(CALENDAR_ID, events)):
+            if error is not None:
+                results[index]["error"] = str(error)
+                continue
+            results[index]["status"] = "booked"
+            results[index]["event_id"] = event.get("id")
+            results[index]["meet_link"] = event.get("hangoutLink", "No link generated")
+
+    for date in booked_dates:
+        invalidate_freebusy(date)
+    return results
 
 def get_free_slots(date: str):
     """
@@ -169,35 +411,14 @@ def get_free_slots(date: str):
     :param date: format YYYY-MM-DD
     :return: List of available time ranges in ISO format
     """
-    tz = pytz.timezone(TIMEZONE)
-    busy_times = get_busy_slots(date)
-
-    date_obj = datetime.datetime.strptime(date, "%Y-%m-%d")
-    start_of_day = tz.localize(datetime.datetime.combine(date_obj, datetime.time(WORK_HOURS_START, 0)))
-    end_of_day = tz.localize(datetime.datetime.combine(date_obj, datetime.time(WORK_HOURS_END, 0)))
-
-    available_slots = []
-    current = start_of_day
+    day = _parse_date(date)
+    slots = get_slot_engine().available_slots(day, day, [CALENDAR_ID])[date]
+    return [{"start": slot["start"].isoformat(), "end": slot["end"].isoformat()} for slot in slots]
 
-    while current + datetime.timedelta(minutes=SLOT_DURATION) <= end_of_day:
-        slot_end = current + datetime.timedelta(minutes=SLOT_DURATION)
-        overlap = False
 
-        for busy in busy_times:
-            busy_start = datetime.datetime.fromisoformat(busy['start'])
-            busy_end = datetime.datetime.fromisoformat(busy['end'])
-
-            if current < busy_end and slot_end > busy_start:
-                overlap = True
-                break
-
-        if not overlap:
-            available_slots.append({
-                "start": current.isoformat(),
-                "end": slot_end.isoformat()
-            })
-
-        current = slot_end
-
-    return available_slots
- 
\ No newline at end of file
+if __name__ == "__main__":
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    slots = get_available_slots(today)
+    print(f"Available slots for {today}:")
+    for s in slots:
+        print("•", s)
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from pytz import timezone
 import os.path
 import pickle
+from backend.services.slot_engine import SlotConfig, SlotEngine, InMemoryBusyProvider
  
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 IST = timezone('Asia/Kolkata')
@@ -59,14 +60,6 @@ def get_busy_slots_and_events(service, from_time):
  
     return busy_slots, scheduled_meetings
  
-def generate_time_slots(start_time, end_time, duration_minutes=30):
-    slots = []
-    current = start_time
-    while current + timedelta(minutes=duration_minutes) <= end_time:
-        slots.append((current, current + timedelta(minutes=duration_minutes)))
-        current += timedelta(minutes=duration_minutes)
-    return slots
- 
 def check_availability_and_show(service, requested_start_time: datetime):
     requested_end_time = requested_start_time + timedelta(minutes=30)
     busy_slots, scheduled_meetings = get_busy_slots_and_events(service, requested_start_time)
@@ -90,12 +83,8 @@ def check_availability_and_show(service, requested_start_time: datetime):
     # Show available slots
     print("\n🟢 Available Slots (30 min each after your requested time):")
     _, end_of_day = get_today_range()
-    all_slots = generate_time_slots(requested_start_time, end_of_day)
-    available_slots = []
- 
-    for slot_start, slot_end in all_slots:
-        if not any(max(slot_start, b_start) < min(slot_end, b_end) for b_start, b_end in busy_slots):
-            available_slots.append((slot_start, slot_end))
+    engine = SlotEngine(InMemoryBusyProvider({'primary': busy_slots}), SlotConfig(timezone='Asia/Kolkata'))
+    available_slots = engine.free_slots_between(requested_start_time, end_of_day, 'primary')
  
     for s, e in available_slots:
         print(f"🕒 {s.strftime('%I:%M %p')} - {e.strftime('%I:%M %p')}")
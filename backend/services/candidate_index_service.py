@@ -0,0 +1,285 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from backend.services.resume_prefilter_service import N_FEATURES, term_frequencies, l2_normalize
+
+CANDIDATE_INDEX_DIR = os.getenv("CANDIDATE_INDEX_DIR", "db/candidate_index")
+INITIAL_CAPACITY = 1024
+PREVIEW_CHARS = 200
+
+
+class CandidateIndex:
+    """
+    Persistent index of every resume ingested, for instant JD matching.
+
+    Vectors are hashed, L2-normalised log-TF rows in a memory-mapped float32
+    matrix (vectors.f32) and document frequencies live in a memory-mapped
+    int64 vector (df.i64), so queries can be IDF-weighted. index.db (SQLite)
+    maps candidate ids to rows and holds per-candidate metadata, so an add
+    writes only its own rows. Deleted rows are zeroed and reused by later adds.
+
+    Writers hold SQLite's write lock (BEGIN IMMEDIATE) while they touch the
+    memmaps, which serialises them across server processes; every write bumps
+    a version number, and a process that sees a version it did not write
+    reloads its row -> id array before searching or writing.
+    """
+
+    def __init__(self, directory: str = CANDIDATE_INDEX_DIR, n_features: int = N_FEATURES):
+        self.directory = directory
+        self.n_features = n_features
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._version = None
+        self._vectors = None
+        self._df = None
+        self._capacity = 0
+        self._next_row = 0
+        self._row_ids = np.empty(0, dtype=object)  # row -> candidate id, None if free
+        self._saved_rows: Dict[int, np.ndarray] = {}  # pre-write contents of rows changed in _write
+        self._occupied = np.zeros(0, dtype=bool)
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def _df_path(self) -> str:
+        return os.path.join(self.directory, "df.i64")
+
+    @property
+    def _db_path(self) -> str:
+        return os.path.join(self.directory, "index.db")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is not None:
+            return self._conn
+        os.makedirs(self.directory, exist_ok=True)
+        conn = sqlite3.connect(self._db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS candidates (
+                    candidate_id TEXT PRIMARY KEY,
+                    row INTEGER NOT NULL UNIQUE,
+                    meta TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY)")
+            state = dict(conn.execute("SELECT key, value FROM state").fetchall())
+            if not state:
+                self._create_files(conn)
+            elif state["n_features"] != self.n_features:
+                raise ValueError(
+                    f"Index at {self.directory} uses {state['n_features']} features, expected {self.n_features}"
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            conn.close()
+            raise
+        self._conn = conn
+        return conn
+
+    def _create_files(self, conn: sqlite3.Connection):
+        np.memmap(self._vectors_path, dtype=np.float32, mode="w+",
+                  shape=(INITIAL_CAPACITY, self.n_features)).flush()
+        np.memmap(self._df_path, dtype=np.int64, mode="w+", shape=(self.n_features,)).flush()
+        conn.executemany(
+            "INSERT INTO state (key, value) VALUES (?, ?)",
+            [("n_features", self.n_features), ("capacity", INITIAL_CAPACITY), ("next_row", 0), ("version", 0)]
+        )
+
+    def _sync(self, conn: sqlite3.Connection):
+        """Reload the row map and remap the files if another process has written"""
+        state = dict(conn.execute("SELECT key, value FROM state").fetchall())
+        if state["version"] == self._version:
+            return
+        if state["capacity"] != self._capacity or self._vectors is None:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                      shape=(state["capacity"], self.n_features))
+            self._capacity = state["capacity"]
+        if self._df is None:
+            self._df = np.memmap(self._df_path, dtype=np.int64, mode="r+", shape=(self.n_features,))
+        self._next_row = state["next_row"]
+        self._row_ids = np.empty(self._capacity, dtype=object)
+        self._occupied = np.zeros(self._capacity, dtype=bool)
+        for candidate_id, row in conn.execute("SELECT candidate_id, row FROM candidates"):
+            self._row_ids[row] = candidate_id
+            self._occupied[row] = True
+        self._version = state["version"]
+
+    @contextmanager
+    def _write(self):
+        """
+        Cross-process write section. If it fails, the SQLite changes roll
+        back, the memmap rows and df it touched are restored and in-memory
+        state is reloaded, so vectors never drift from the row map.
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            self._saved_rows = {}
+            saved_df = None
+            try:
+                self._sync(conn)
+                saved_df = np.array(self._df)
+                yield conn
+                self._version += 1
+                conn.executemany("UPDATE state SET value = ? WHERE key = ?", [
+                    (self._version, "version"), (self._capacity, "capacity"), (self._next_row, "next_row"),
+                ])
+                self._vectors.flush()
+                self._df.flush()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                if saved_df is not None:
+                    for row, vector in self._saved_rows.items():
+                        self._vectors[row] = vector
+                    self._df[:] = saved_df
+                    self._vectors.flush()
+                    self._df.flush()
+                self._version = None
+                raise
+
+    def _set_row(self, row: int, vector):
+        """Overwrite a vector row, keeping its old contents until the write commits"""
+        if row not in self._saved_rows:
+            self._saved_rows[row] = np.array(self._vectors[row])
+        self._vectors[row] = vector
+
+    def _grow(self):
+        new_capacity = self._capacity * 2
+        self._vectors.flush()
+        self._vectors = None
+        with open(self._vectors_path, "r+b") as f:
+            f.truncate(new_capacity * self.n_features * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                  shape=(new_capacity, self.n_features))
+        self._row_ids = np.concatenate([self._row_ids, np.empty(new_capacity - self._capacity, dtype=object)])
+        self._occupied = np.concatenate([self._occupied, np.zeros(new_capacity - self._capacity, dtype=bool)])
+        self._capacity = new_capacity
+
+    def _allocate_row(self, conn: sqlite3.Connection) -> int:
+        free = conn.execute("SELECT row FROM free_rows LIMIT 1").fetchone()
+        if free:
+            conn.execute("DELETE FROM free_rows WHERE row = ?", free)
+            return free[0]
+        if self._next_row >= self._capacity:
+            self._grow()
+        row = self._next_row
+        self._next_row += 1
+        return row
+
+    def add_many(self, entries: List[Tuple[str, str, Dict]]) -> int:
+        """
+        Add or replace (candidate_id, resume_text, metadata) entries.
+        Returns the number of candidates written.
+        """
+        entries = [e for e in entries if e[1].strip()]
+        if not entries:
+            return 0
+
+        tf = term_frequencies([text for _, text, _ in entries], self.n_features)
+        vectors = l2_normalize(tf)
+
+        with self._write() as conn:
+            for (candidate_id, text, meta), vector, raw in zip(entries, vectors, tf):
+                self._remove_row(conn, candidate_id)
+                row = self._allocate_row(conn)
+                meta = {
+                    **meta,
+                    "preview": " ".join(text.split())[:PREVIEW_CHARS],
+                    "indexed_at": time.time(),
+                }
+                conn.execute(
+                    "INSERT INTO candidates (candidate_id, row, meta) VALUES (?, ?, ?)",
+                    (candidate_id, row, json.dumps(meta))
+                )
+                self._set_row(row, vector)
+                self._df += raw > 0
+                self._row_ids[row] = candidate_id
+                self._occupied[row] = True
+        return len(entries)
+
+    def add(self, candidate_id: str, resume_text: str, meta: Optional[Dict] = None) -> bool:
+        return self.add_many([(candidate_id, resume_text, meta or {})]) > 0
+
+    def _remove_row(self, conn: sqlite3.Connection, candidate_id: str) -> bool:
+        found = conn.execute("SELECT row FROM candidates WHERE candidate_id = ?", (candidate_id,)).fetchone()
+        if not found:
+            return False
+        row = found[0]
+        conn.execute("DELETE FROM candidates WHERE candidate_id = ?", (candidate_id,))
+        conn.execute("INSERT INTO free_rows (row) VALUES (?)", (row,))
+        self._df -= self._vectors[row] > 0
+        self._set_row(row, 0)
+        self._row_ids[row] = None
+        self._occupied[row] = False
+        return True
+
+    def delete(self, candidate_id: str) -> bool:
+        with self._write() as conn:
+            return self._remove_row(conn, candidate_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def search(self, job_description: str, top_n: int = 10) -> List[Dict]:
+        """Top N indexed candidates by IDF-weighted cosine similarity to the JD"""
+        with self._lock:
+            conn = self._connect()
+            self._sync(conn)
+            used = self._next_row
+            occupied = self._occupied[:used]
+            count = int(occupied.sum())
+            if count == 0:
+                return []
+
+            idf = np.log((1 + count) / (1 + self._df)) + 1.0
+            query = l2_normalize(term_frequencies([job_description], self.n_features)[0] * idf)
+
+            similarities = np.asarray(self._vectors[:used] @ query)
+            similarities[~occupied] = -np.inf
+
+            top_n = min(top_n, count)
+            top = np.argpartition(-similarities, top_n - 1)[:top_n]
+            ranked = top[np.argsort(-similarities[top])]
+            ids = [self._row_ids[row] for row in ranked]
+
+            placeholders = ",".join("?" * len(ids))
+            meta = {
+                candidate_id: json.loads(value)
+                for candidate_id, value in conn.execute(
+                    f"SELECT candidate_id, meta FROM candidates WHERE candidate_id IN ({placeholders})", ids
+                )
+            }
+
+        return [
+            {
+                "candidate_id": candidate_id,
+                "similarity": round(float(similarities[row]), 4),
+                **meta.get(candidate_id, {}),
+            }
+            for candidate_id, row in zip(ids, ranked)
+        ]
+
+
+candidate_index = CandidateIndex()
+
+
+def index_resumes(entries: List[Tuple[str, str, Dict]]) -> int:
+    """Best-effort ingestion from the upload routes; indexing never fails a request"""
+    try:
+        return candidate_index.add_many(entries)
+    except Exception as e:
+        print(f"[INDEX ERROR] {e}")
+        return 0
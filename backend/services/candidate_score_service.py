@@ -1,31 +1,148 @@
-from backend.llm.llm_setup import get_llm
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+import asyncio
+import os
+import random
+import re
+from typing import Dict, List
+from pydantic import ValidationError
+from backend.models.candidate_score import CandidateScoreResult
+from backend.llm.llm_setup import get_candidate_score_chain, run_chain, arun_chain
+from backend.services.resume_prefilter_service import shortlist_top_k as shortlist_top_k_resumes
 
-def score_candidate_match(resume_text: str, job_description: str) -> str:
-    prompt = PromptTemplate(
-        input_variables=["resume_text", "job_description"],
-        template="""
-You're an AI hiring assistant. Given the following candidate resume and job description, score the candidate's suitability for the job on a scale of 0 to 100.
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", "4"))
+RATE_LIMIT_BACKOFF_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_SECONDS", "2"))
 
-Also, provide a 2-3 sentence justification explaining why the score was given.
+SCORE_PARSE_RETRIES = int(os.getenv("SCORE_PARSE_RETRIES", "2"))
 
-Resume:
-{resume_text}
+JSON_OBJECT_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
 
-Job Description:
-{job_description}
+class ScoreParseError(ValueError):
+    pass
 
-Respond in the format:
-Score: <number>
-Justification: <text>
-"""
-    )
+def parse_score_result(text: str) -> CandidateScoreResult:
+    """
+    Validate the LLM's JSON reply against CandidateScoreResult.
+    Tolerates markdown fences or chatter around the JSON object.
+    """
+    match = JSON_OBJECT_PATTERN.search(text)
+    if not match:
+        raise ScoreParseError("LLM response contained no JSON object")
+    try:
+        return CandidateScoreResult.model_validate_json(match.group(0))
+    except ValidationError as e:
+        raise ScoreParseError(f"LLM response did not match the score schema: {e}")
 
-    chain = LLMChain(llm=get_llm(), prompt=prompt)
-    result = chain.run({
-        "resume_text": resume_text,
-        "job_description": job_description
-    })
+def score_candidate_match(resume_text: str, job_description: str, use_cache: bool = True) -> CandidateScoreResult:
+    """
+    Score a resume against a job description and return the validated result.
+    Malformed replies are re-requested (bypassing the cache) up to
+    SCORE_PARSE_RETRIES times before ScoreParseError is raised; only replies
+    that parse are cached, so a good retry replaces a bad cached entry.
+    """
+    chain = get_candidate_score_chain()
+    inputs = {"resume_text": resume_text, "job_description": job_description}
 
-    return result.strip()
+    for attempt in range(SCORE_PARSE_RETRIES + 1):
+        result = run_chain(chain, inputs, use_cache=use_cache and attempt == 0, validate=parse_score_result)
+        try:
+            return parse_score_result(result)
+        except ScoreParseError as e:
+            error = e
+            print(f"[SCORE] Malformed LLM response (attempt {attempt + 1}): {e}")
+    raise error
+
+async def ascore_candidate_match(resume_text: str, job_description: str, use_cache: bool = True) -> CandidateScoreResult:
+    chain = get_candidate_score_chain()
+    inputs = {"resume_text": resume_text, "job_description": job_description}
+
+    for attempt in range(SCORE_PARSE_RETRIES + 1):
+        result = await arun_chain(chain, inputs, use_cache=use_cache and attempt == 0, validate=parse_score_result)
+        try:
+            return parse_score_result(result)
+        except ScoreParseError as e:
+            error = e
+            print(f"[SCORE] Malformed LLM response (attempt {attempt + 1}): {e}")
+    raise error
+
+def is_rate_limit_error(error: Exception) -> bool:
+    message = f"{type(error).__name__} {error}".lower()
+    return any(marker in message for marker in ("429", "resourceexhausted", "rate limit", "quota"))
+
+class RateLimitGate:
+    """
+    Shared pause for all batch workers: when one call is rate limited every
+    worker waits out the backoff instead of hammering the API in parallel.
+    """
+
+    def __init__(self):
+        self.resume_at = 0.0
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        delay = self.resume_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def back_off(self, seconds: float):
+        loop = asyncio.get_running_loop()
+        self.resume_at = max(self.resume_at, loop.time() + seconds)
+
+async def score_candidates_batch(items: List[Dict], job_description: str,
+                                 max_concurrency: int = BATCH_MAX_CONCURRENCY,
+                                 use_cache: bool = True,
+                                 shortlist_top_k: int = 0) -> List[Dict]:
+    """
+    Score many resumes against one job description with bounded concurrency.
+    items are {"filename", "resume_text", "error"} dicts; items that already
+    carry an error are passed through. With shortlist_top_k > 0 a local TF-IDF
+    pre-filter ranks everyone first and only the top K go to the LLM.
+    Returns results ranked by score, then by pre-filter similarity, with
+    failed items last.
+    """
+    similarity = {}
+    skipped = set()
+    if shortlist_top_k > 0:
+        readable = [i for i, item in enumerate(items) if not item.get("error")]
+        ranking = await asyncio.to_thread(
+            shortlist_top_k_resumes, [items[i]["resume_text"] for i in readable], job_description, shortlist_top_k
+        )
+        for entry in ranking:
+            similarity[readable[entry["index"]]] = entry["similarity"]
+            if not entry["shortlisted"]:
+                skipped.add(readable[entry["index"]])
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    gate = RateLimitGate()
+
+    async def score_one(position: int, item: Dict) -> Dict:
+        result = {"filename": item["filename"], "score": None, "result": None, "error": item.get("error") or None}
+        if position in similarity:
+            result["prefilter_similarity"] = similarity[position]
+            result["shortlisted"] = position not in skipped
+        if result["error"] or position in skipped:
+            return result
+
+        async with semaphore:
+            for attempt in range(BATCH_MAX_RETRIES + 1):
+                await gate.wait()
+                try:
+                    score_result = await ascore_candidate_match(item["resume_text"], job_description, use_cache)
+                    result["result"] = score_result.model_dump()
+                    result["score"] = score_result.score
+                    return result
+                except Exception as e:
+                    if is_rate_limit_error(e) and attempt < BATCH_MAX_RETRIES:
+                        backoff = RATE_LIMIT_BACKOFF_SECONDS * (2 ** attempt) + random.uniform(0, 1)
+                        gate.back_off(backoff)
+                        continue
+                    result["error"] = str(e)
+                    return result
+        return result
+
+    results = await asyncio.gather(*(score_one(i, item) for i, item in enumerate(items)))
+    results.sort(key=lambda r: (
+        r["score"] is None, r["error"] is not None, -(r["score"] or 0), -r.get("prefilter_similarity", 0)
+    ))
+    for rank, result in enumerate(results, 1):
+        result["rank"] = rank if result["score"] is not None else None
+    return results
@@ -0,0 +1,255 @@
+import email
+import email.policy
+import os
+import random
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import Dict, List, Optional, Tuple
+from backend.services import booking_db
+from backend.utils.smtp_pool import send_message
+
+# Outbound mail is queued in the booking database and delivered by background workers
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "5"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "900"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+# A message claimed longer ago than this is presumed abandoned by a dead
+# worker and is delivered again; keep it well above SMTP_TIMEOUT_SECONDS
+OUTBOX_VISIBILITY_TIMEOUT_SECONDS = float(os.getenv("OUTBOX_VISIBILITY_TIMEOUT_SECONDS", "300"))
+# Cap on deliveries per second across all workers (0 = unlimited), to stay under provider limits
+OUTBOX_MAX_PER_SECOND = float(os.getenv("OUTBOX_MAX_PER_SECOND", "0"))
+# Sent rows considered for the delivery latency percentiles
+LATENCY_WINDOW = 1000
+
+_wakeup = threading.Event()
+_stop = threading.Event()
+_workers: List[threading.Thread] = []
+_workers_lock = threading.Lock()
+_stats = {"enqueued": 0, "duplicates": 0, "sent": 0, "retried": 0, "dead_lettered": 0}
+_stats_lock = threading.Lock()
+
+def _count(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+class _RateLimiter:
+    """Spaces deliveries at least 1/rate seconds apart, shared by all workers"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+_rate_limiter = _RateLimiter(OUTBOX_MAX_PER_SECOND)
+
+def wake():
+    """Nudge idle workers (e.g. after committing a transaction that queued mail)"""
+    _wakeup.set()
+
+def enqueue(msg: Message, dedup_key: Optional[str] = None, not_before: Optional[float] = None) -> Tuple[int, bool]:
+    """
+    Queue a message for delivery and return (outbox id, newly queued).
+    A message whose dedup_key is already in the outbox (in any state) is
+    not queued again; the existing id is returned with False. not_before
+    (epoch seconds) delays the first delivery attempt. Inside a
+    booking_db.transaction() the message is queued atomically with the
+    caller's other writes.
+    """
+    now = time.time()
+    cursor = booking_db.execute("""
+        INSERT INTO email_outbox (dedup_key, to_email, subject, message, status, attempts, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, 'pending', 0, ?, ?)
+        ON CONFLICT(dedup_key) DO NOTHING
+    """, (dedup_key, msg.get("To", ""), msg.get("Subject", ""), msg.as_bytes(), max(now, not_before or now), now))
+
+    if cursor.rowcount == 1:
+        _count("enqueued")
+        _wakeup.set()
+        return cursor.lastrowid, True
+
+    _count("duplicates")
+    existing = booking_db.fetch_one("SELECT id FROM email_outbox WHERE dedup_key = ?", (dedup_key,))
+    return existing["id"], False
+
+def _claim() -> Optional[Dict]:
+    """
+    Atomically lease the next message to this worker (safe across workers and
+    processes): a 'sending' row whose lease has expired first, otherwise the
+    next due 'pending' one.
+    """
+    now = time.time()
+    # fetch_all steps the UPDATE ... RETURNING to completion, so the write is committed on return
+    rows = booking_db.fetch_all("""
+        UPDATE email_outbox
+        SET status = 'sending', attempts = attempts + 1, claimed_at = ?
+        WHERE id = COALESCE(
+            (SELECT id FROM email_outbox WHERE status = 'sending' AND claimed_at < ? LIMIT 1),
+            (SELECT id FROM email_outbox
+             WHERE status = 'pending' AND next_attempt_at <= ?
+             ORDER BY next_attempt_at
+             LIMIT 1)
+        )
+        RETURNING id, message, attempts, created_at, claimed_at
+    """, (now, now - OUTBOX_VISIBILITY_TIMEOUT_SECONDS, now))
+    return rows[0] if rows else None
+
+def _is_permanent(error: Exception) -> bool:
+    """Rejections that will fail the same way on every retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        # {recipient: (code, message)}; a 4xx (mailbox busy, greylisting) is worth retrying
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(500 <= code < 600 for code in codes)
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+def _backoff(attempts: int) -> float:
+    delay = min(OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX_SECONDS)
+    # Jitter so messages that failed together do not retry in lockstep
+    return delay * random.uniform(0.8, 1.2)
+
+# Outcome updates apply only while this worker still holds the lease it claimed
+_LEASED = "id = ? AND status = 'sending' AND claimed_at = ?"
+
+def _deliver(row: Dict):
+    msg = email.message_from_bytes(row["message"], policy=email.policy.SMTP)
+    _rate_limiter.wait()
+    try:
+        send_message(msg)
+    except Exception as e:
+        if _is_permanent(e) or row["attempts"] >= OUTBOX_MAX_ATTEMPTS:
+            booking_db.execute(
+                f"UPDATE email_outbox SET status = 'dead', last_error = ? WHERE {_LEASED}",
+                (str(e), row["id"], row["claimed_at"])
+            )
+            _count("dead_lettered")
+            print(f"❌ Email {row['id']} dead-lettered after {row['attempts']} attempts: {e}")
+        else:
+            booking_db.execute(
+                f"UPDATE email_outbox SET status = 'pending', last_error = ?, next_attempt_at = ? WHERE {_LEASED}",
+                (str(e), time.time() + _backoff(row["attempts"]), row["id"], row["claimed_at"])
+            )
+            _count("retried")
+        return
+
+    booking_db.execute(
+        f"UPDATE email_outbox SET status = 'sent', sent_at = ?, last_error = NULL, message = NULL WHERE {_LEASED}",
+        (time.time(), row["id"], row["claimed_at"])
+    )
+    _count("sent")
+
+def drain_once() -> int:
+    """Deliver every message that is due right now; returns how many were attempted"""
+    attempted = 0
+    while not _stop.is_set():
+        row = _claim()
+        if row is None:
+            break
+        _deliver(row)
+        attempted += 1
+    return attempted
+
+def _worker_loop():
+    while not _stop.is_set():
+        try:
+            if drain_once() == 0:
+                _wakeup.wait(OUTBOX_POLL_SECONDS)
+                _wakeup.clear()
+        except Exception as e:
+            print(f"[OUTBOX ERROR] {e}")
+            time.sleep(OUTBOX_POLL_SECONDS)
+
+def start_workers(count: int = OUTBOX_WORKERS):
+    """
+    Start the delivery threads (app startup). Messages whose lease expired in
+    'sending' (their process died mid-delivery) are put back in the queue
+    first; rows another live process is delivering right now are left alone.
+    """
+    with _workers_lock:
+        if _workers:
+            return
+        recovered = booking_db.execute(
+            "UPDATE email_outbox SET status = 'pending' WHERE status = 'sending' AND claimed_at < ?",
+            (time.time() - OUTBOX_VISIBILITY_TIMEOUT_SECONDS,)
+        ).rowcount
+        if recovered:
+            print(f"[OUTBOX] Re-queued {recovered} interrupted deliveries")
+        _stop.clear()
+        for i in range(count):
+            worker = threading.Thread(target=_worker_loop, name=f"email-outbox-{i}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+def stop_workers(timeout: float = 10):
+    with _workers_lock:
+        _stop.set()
+        _wakeup.set()
+        for worker in _workers:
+            worker.join(timeout)
+        _workers.clear()
+
+def requeue_dead(outbox_id: Optional[int] = None) -> int:
+    """Give dead-lettered messages (one, or all) a fresh set of attempts"""
+    sql = "UPDATE email_outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'dead'"
+    params = [time.time()]
+    if outbox_id is not None:
+        sql += " AND id = ?"
+        params.append(outbox_id)
+    requeued = booking_db.execute(sql, params).rowcount
+    if requeued:
+        _wakeup.set()
+    return requeued
+
+def deliveries_by_key_prefix(prefix: str) -> List[Dict]:
+    """Delivery state of every message whose dedup_key starts with prefix (a campaign, say)"""
+    # Range scan on the unique dedup_key index; U+10FFFF sorts after any real key character
+    return booking_db.fetch_all("""
+        SELECT id, dedup_key, to_email, status, attempts, last_error, created_at, sent_at
+        FROM email_outbox
+        WHERE dedup_key >= ? AND dedup_key < ?
+        ORDER BY id
+    """, (prefix, prefix + "\U0010ffff"))
+
+def _percentile(values: List[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def outbox_stats() -> Dict:
+    """Queue depth per status, age of the oldest waiting message and enqueue-to-sent latency"""
+    depth = {status: 0 for status in ("pending", "sending", "sent", "dead")}
+    for row in booking_db.fetch_all("SELECT status, COUNT(*) AS n FROM email_outbox GROUP BY status"):
+        depth[row["status"]] = row["n"]
+
+    oldest = booking_db.fetch_one("SELECT MIN(created_at) AS t FROM email_outbox WHERE status IN ('pending', 'sending')")
+    latencies = sorted(
+        row["latency"] for row in booking_db.fetch_all(
+            "SELECT sent_at - created_at AS latency FROM email_outbox WHERE status = 'sent' ORDER BY sent_at DESC LIMIT ?",
+            (LATENCY_WINDOW,)
+        )
+    )
+    with _stats_lock:
+        counters = dict(_stats)
+
+    return {
+        **counters,
+        "depth": depth,
+        "queue_depth": depth["pending"] + depth["sending"],
+        "oldest_pending_age_seconds": round(time.time() - oldest["t"], 3) if oldest and oldest["t"] else 0.0,
+        "delivery_latency_seconds": {
+            "count": len(latencies),
+            "p50": round(_percentile(latencies, 0.5), 3) if latencies else None,
+            "p95": round(_percentile(latencies, 0.95), 3) if latencies else None,
+            "max": round(latencies[-1], 3) if latencies else None,
+        },
+        "workers": len(_workers),
+    }
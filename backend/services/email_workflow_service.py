@@ -1,118 +1,63 @@
-import smtplib
-import sqlite3
+import json
+import os
 import re
+import time
 from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-from backend.services.calendar_service import get_available_slots
-from backend.services.lock_service import ensure_db_exists
+from urllib.parse import urlencode
+from backend.services.calendar_service import get_available_slots, get_free_slots, SLOT_DURATION
+from backend.services import booking_db
+from backend.services import email_outbox
+from backend.utils.email_templates import build_message
 
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
-FROM_EMAIL = "YOUR_EMAIL_ID"
-APP_PASSWORD = "YOUR_PASSWORD"
-DB_PATH = "db/calendar_booking.db"
+# Messages are queued in the outbox and delivered by its workers through the
+# shared SMTP pool (connection, TLS and login settings: SMTP_* env vars)
+FROM_EMAIL = os.getenv("SMTP_FROM", "YOUR_EMAIL_ID")
+# Where the "Book Slot" links in slot selection emails point
+BOOKING_BASE_URL = os.getenv("BOOKING_BASE_URL", "http://localhost:8000").rstrip("/")
+# Slots offered per slot selection email (replies pick one by number)
+SLOTS_PER_EMAIL = 5
 
 class EmailWorkflowService:
     def __init__(self):
-        ensure_db_exists()
+        booking_db.migrate()
     
     def send_shortlisting_email(self, candidate_email: str, candidate_name: str, 
-                              job_title: str, score: int) -> bool:
+                              job_title: str, score: int, dedup_key: Optional[str] = None) -> bool:
         """
         Send initial shortlisting email asking for availability
         """
-        subject = f"Congratulations! You're shortlisted for {job_title}"
-        
-        body = f"""
-        <html>
-        <body>
-            <h2>Congratulations {candidate_name}!</h2>
-            <p>We are pleased to inform you that you have been shortlisted for the position of <strong>{job_title}</strong>.</p>
-            <p>Your application scored <strong>{score}/100</strong> in our initial screening.</p>
-            
-            <h3>Next Steps:</h3>
-            <p>We would like to schedule an interview with you. Please reply to this email with your preferred date(s) for the interview in the following format:</p>
-            
-            <div style="background-color: #f0f0f0; padding: 15px; border-radius: 5px; margin: 10px 0;">
-                <strong>AVAILABILITY: YYYY-MM-DD</strong><br>
-                Example: AVAILABILITY: 2025-07-25
-            </div>
-            
-            <p>We will then send you available time slots for your selected date.</p>
-            
-            <p>Looking forward to hearing from you!</p>
-            
-            <br>
-            <p>Best regards,<br>
-            HR Team<br>
-            AI Recruiter Agent</p>
-        </body>
-        </html>
-        """
-        
-        return self._send_email(candidate_email, subject, body)
+        return self._send_email(
+            candidate_email, "shortlisting", dedup_key,
+            candidate_name=candidate_name, job_title=job_title, score=score
+        )
     
     def send_slot_selection_email(self, candidate_email: str, candidate_name: str, 
-                                 interview_date: str, slots: List[str]) -> bool:
+                                 interview_date: str, slots: List[str], dedup_key: Optional[str] = None,
+                                 slot_times: Optional[List[str]] = None) -> bool:
         """
-        Send email with available slots for selection
-        """
-        subject = f"Interview Slots Available - {candidate_name}"
-        
-        slots_html = ""
-        for i, slot in enumerate(slots, 1):
-            slots_html += f"""
-            <div style="margin: 10px 0; padding: 10px; border: 1px solid #ddd; border-radius: 5px;">
-                <strong>Option {i}:</strong> {slot}
-            </div>
-            """
-        
-        # Generate unique booking links for each slot
-        booking_links = ""
-        for i, slot in enumerate(slots, 1):
-            # Create a simple booking URL (you can implement a web interface later)
-            booking_url = f"http://localhost:8000/book-slot?email={candidate_email}&slot={slot}&name={candidate_name}"
-            booking_links += f"""
-            <a href="{booking_url}" 
-               style="display: inline-block; margin: 5px; padding: 10px 20px; 
-                      background-color: #007bff; color: white; text-decoration: none; 
-                      border-radius: 5px;">
-                Book Slot {i}
-            </a>
-            """
-        
-        body = f"""
-        <html>
-        <body>
-            <h2>Interview Slots Available</h2>
-            <p>Dear {candidate_name},</p>
-            <p>Thank you for your interest! We have the following time slots available for <strong>{interview_date}</strong>:</p>
-            
-            {slots_html}
-            
-            <h3>How to Book:</h3>
-            <p>Click on one of the buttons below to book your preferred slot:</p>
-            <div style="margin: 20px 0;">
-                {booking_links}
-            </div>
-            
-            <p><strong>Note:</strong> Slots are available on a first-come, first-served basis.</p>
-            
-            <p>Alternatively, reply to this email with your preferred slot number (1-{len(slots)}).</p>
-            
-            <br>
-            <p>Best regards,<br>
-            HR Team</p>
-        </body>
-        </html>
+        Send email with available slots for selection. slot_times (ISO start
+        times, parallel to the display labels in slots) go in the booking
+        links; without them the labels are used.
         """
-        
-        return self._send_email(candidate_email, subject, body)
+        # One booking link per slot, with every parameter URL-encoded
+        slot_links = [
+            {
+                "label": slot,
+                "booking_url": f"{BOOKING_BASE_URL}/book-slot?" + urlencode(
+                    {"email": candidate_email, "slot": slot_time, "name": candidate_name}
+                ),
+            }
+            for slot, slot_time in zip(slots, slot_times or slots)
+        ]
+        return self._send_email(
+            candidate_email, "slot_selection", dedup_key,
+            candidate_name=candidate_name, interview_date=interview_date, slots=slot_links
+        )
     
     def send_confirmation_email(self, candidate_email: str, candidate_name: str, 
-                               slot_time: str, meet_link: str) -> bool:
+                               slot_time: str, meet_link: str, dedup_key: Optional[str] = None) -> bool:
         """
         Send interview confirmation email with Google Meet link
         """
@@ -120,43 +65,41 @@ class EmailWorkflowService:
         slot_dt = datetime.fromisoformat(slot_time.replace('Z', '+00:00'))
         formatted_time = slot_dt.strftime("%B %d, %Y at %I:%M %p")
         
-        subject = f"Interview Confirmed - {formatted_time}"
-        
-        body = f"""
-        <html>
-        <body>
-            <h2>Interview Confirmed!</h2>
-            <p>Dear {candidate_name},</p>
-            <p>Your interview has been successfully scheduled for:</p>
-            
-            <div style="background-color: #e8f5e8; padding: 20px; border-radius: 10px; margin: 20px 0;">
-                <h3 style="color: #2e7d32; margin: 0 0 10px 0;">📅 Interview Details</h3>
-                <p><strong>Date & Time:</strong> {formatted_time}</p>
-                <p><strong>Duration:</strong> 30 minutes</p>
-                <p><strong>Meeting Link:</strong> <a href="{meet_link}" style="color: #1976d2;">{meet_link}</a></p>
-            </div>
-            
-            <h3>Before the Interview:</h3>
-            <ul>
-                <li>Please join the meeting 5 minutes early</li>
-                <li>Ensure you have a stable internet connection</li>
-                <li>Test your camera and microphone</li>
-                <li>Keep your resume and relevant documents ready</li>
-            </ul>
-            
-            <p>If you need to reschedule, please reply to this email at least 24 hours before the interview.</p>
-            
-            <p>We look forward to meeting you!</p>
-            
-            <br>
-            <p>Best regards,<br>
-            HR Team<br>
-            AI Recruiter Agent</p>
-        </body>
-        </html>
+        return self._send_email(
+            candidate_email, "confirmation", dedup_key,
+            candidate_name=candidate_name, formatted_time=formatted_time,
+            duration_minutes=SLOT_DURATION, meet_link=meet_link
+        )
+    
+    def offer_interview_slots(self, workflow: Dict, interview_date: str,
+                              dedup_key: Optional[str] = None) -> List[str]:
         """
+        Email the first SLOTS_PER_EMAIL free slots on interview_date and
+        record them on the workflow row (status slots_sent), so a reply
+        naming a slot number can be booked. Returns the slot labels sent;
+        empty if nothing is free that day.
+        """
+        free = get_free_slots(interview_date)[:SLOTS_PER_EMAIL]
+        if not free:
+            return []
+        
+        labels = [
+            f"{datetime.fromisoformat(slot['start']):%Y-%m-%d %H:%M} - {datetime.fromisoformat(slot['end']):%H:%M}"
+            for slot in free
+        ]
+        slot_times = [slot["start"] for slot in free]
+        if not self.send_slot_selection_email(
+            workflow["candidate_email"], workflow["candidate_name"], interview_date,
+            labels, dedup_key, slot_times=slot_times
+        ):
+            raise RuntimeError("Failed to queue slots email")
         
-        return self._send_email(candidate_email, subject, body)
+        booking_db.execute("""
+            UPDATE candidate_workflow
+            SET status = 'slots_sent', interview_date = ?, offered_slots = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (interview_date, json.dumps(slot_times), workflow["id"]))
+        return labels
     
     def parse_availability_email(self, email_body: str) -> Optional[str]:
         """
@@ -199,7 +142,7 @@ class EmailWorkflowService:
             match = re.search(pattern, email_body, re.IGNORECASE)
             if match:
                 slot_num = int(match.group(1))
-                if 1 <= slot_num <= 5:  # Assuming max 5 slots
+                if 1 <= slot_num <= SLOTS_PER_EMAIL:
                     return slot_num
         
         return None
@@ -207,111 +150,223 @@ class EmailWorkflowService:
     def store_candidate_workflow(self, candidate_email: str, candidate_name: str, 
                                job_title: str, score: int, status: str = "shortlisted") -> bool:
         """
-        Store candidate workflow information in database
+        Store candidate workflow information in database.
+        There is one row per (candidate, job): storing the same candidate for
+        the same job again refreshes that row instead of adding one, but only
+        while it is still 'shortlisted'; a workflow that has moved on (slots
+        sent, interview scheduled) is left as it is.
         """
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS candidate_workflow (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    candidate_email TEXT NOT NULL,
-                    candidate_name TEXT NOT NULL,
-                    job_title TEXT NOT NULL,
-                    score INTEGER NOT NULL,
-                    status TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            cursor.execute("""
+            booking_db.execute("""
                 INSERT INTO candidate_workflow 
                 (candidate_email, candidate_name, job_title, score, status)
                 VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(candidate_email, job_title) DO UPDATE SET
+                    candidate_name = excluded.candidate_name,
+                    score = excluded.score,
+                    status = excluded.status,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE candidate_workflow.status = 'shortlisted'
             """, (candidate_email, candidate_name, job_title, score, status))
-            
-            conn.commit()
             return True
             
         except Exception as e:
             print(f"Database error: {e}")
             return False
-        finally:
-            conn.close()
     
-    def update_candidate_status(self, candidate_email: str, status: str) -> bool:
+    def update_candidate_status(self, candidate_email: str, status: str,
+                                job_title: Optional[str] = None) -> bool:
         """
-        Update candidate workflow status
+        Update candidate workflow status: the given job's workflow, or the
+        candidate's most recent one when job_title is not given
         """
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
-                UPDATE candidate_workflow 
-                SET status = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE candidate_email = ?
-            """, (status, candidate_email))
-            
-            conn.commit()
+            if job_title is not None:
+                cursor = booking_db.execute("""
+                    UPDATE candidate_workflow 
+                    SET status = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE candidate_email = ? AND job_title = ?
+                """, (status, candidate_email, job_title))
+            else:
+                cursor = booking_db.execute("""
+                    UPDATE candidate_workflow 
+                    SET status = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = (
+                        SELECT id FROM candidate_workflow
+                        WHERE candidate_email = ?
+                        ORDER BY created_at DESC, id DESC
+                        LIMIT 1
+                    )
+                """, (status, candidate_email))
             return cursor.rowcount > 0
             
         except Exception as e:
             print(f"Database error: {e}")
             return False
-        finally:
-            conn.close()
     
     def get_candidate_workflow(self, candidate_email: str) -> Optional[Dict]:
         """
-        Get candidate workflow information
+        Get candidate workflow information (most recent workflow)
         """
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
+            return booking_db.fetch_one("""
                 SELECT * FROM candidate_workflow 
                 WHERE candidate_email = ?
-                ORDER BY created_at DESC
+                ORDER BY created_at DESC, id DESC
                 LIMIT 1
             """, (candidate_email,))
             
-            row = cursor.fetchone()
-            if row:
-                columns = [desc[0] for desc in cursor.description]
-                return dict(zip(columns, row))
-            return None
-            
         except Exception as e:
             print(f"Database error: {e}")
             return None
-        finally:
-            conn.close()
     
-    def _send_email(self, to_email: str, subject: str, body: str) -> bool:
+    def get_awaiting_reply_workflow(self, candidate_email: str) -> Optional[Dict]:
         """
-        Internal method to send email
+        The candidate's most recent workflow that is waiting on their reply
+        (shortlisted: availability date, slots_sent: slot choice)
         """
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = FROM_EMAIL
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            msg.attach(MIMEText(body, 'html'))
+        return booking_db.fetch_one("""
+            SELECT * FROM candidate_workflow
+            WHERE candidate_email = ? AND status IN ('shortlisted', 'slots_sent')
+            ORDER BY created_at DESC, id DESC
+            LIMIT 1
+        """, (candidate_email,))
+    
+    async def astore_candidate_workflow(self, *args, **kwargs) -> bool:
+        return await booking_db.arun(self.store_candidate_workflow, *args, **kwargs)
+    
+    async def aupdate_candidate_status(self, candidate_email: str, status: str,
+                                       job_title: Optional[str] = None) -> bool:
+        return await booking_db.arun(self.update_candidate_status, candidate_email, status, job_title)
+    
+    async def aget_candidate_workflow(self, candidate_email: str) -> Optional[Dict]:
+        return await booking_db.arun(self.get_candidate_workflow, candidate_email)
+    
+    def shortlist_candidate(self, candidate_email: str, candidate_name: str,
+                            job_title: str, score: int) -> str:
+        """
+        Single-candidate counterpart of shortlist_candidates_bulk: stores the
+        workflow and queues the shortlisting email in one transaction. The
+        email is keyed by the workflow, so shortlisting again does not send
+        it twice, and a workflow already past shortlisting is not touched.
+        Returns "queued", "duplicate" or "skipped".
+        """
+        msg = self._build_message(
+            candidate_email, "shortlisting",
+            candidate_name=candidate_name, job_title=job_title, score=score
+        )
+        with booking_db.transaction():
+            existing = booking_db.fetch_one(
+                "SELECT status FROM candidate_workflow WHERE candidate_email = ? AND job_title = ?",
+                (candidate_email, job_title)
+            )
+            if existing and existing["status"] != "shortlisted":
+                return "skipped"
+            if not self.store_candidate_workflow(candidate_email, candidate_name, job_title, score):
+                raise RuntimeError("Failed to store candidate workflow")
+            workflow = booking_db.fetch_one(
+                "SELECT id FROM candidate_workflow WHERE candidate_email = ? AND job_title = ?",
+                (candidate_email, job_title)
+            )
+            _, queued = email_outbox.enqueue(msg, dedup_key=f"shortlist-workflow:{workflow['id']}")
+        email_outbox.wake()
+        return "queued" if queued else "duplicate"
+    
+    def shortlist_candidates_bulk(self, candidates: List[Dict], job_title: str, campaign_id: str,
+                                  rate_per_second: float = 0) -> List[Dict]:
+        """
+        Shortlist many candidates ({"candidate_email", "candidate_name",
+        "score"}) for one job. Emails are rendered up front from the
+        precompiled templates, then every
+        workflow row and outbox message is written in a single transaction.
+        Messages are keyed by campaign and candidate, so re-submitting a
+        campaign does not email anyone twice. Candidates whose workflow for
+        this job is already past shortlisting (slots sent, interview
+        scheduled) are left untouched and not emailed. rate_per_second > 0
+        staggers first delivery attempts to that rate.
+        Returns {"candidate_email", "status": "queued" | "duplicate" | "skipped", "outbox_id"} per candidate.
+        """
+        messages = []
+        for candidate in candidates:
+            messages.append(self._build_message(
+                candidate["candidate_email"], "shortlisting",
+                candidate_name=candidate["candidate_name"], job_title=job_title, score=candidate["score"]
+            ))
+
+        start = time.time()
+        interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        results = []
+        with booking_db.transaction() as conn:
+            in_progress = {row[0] for row in conn.execute("""
+                SELECT candidate_email FROM candidate_workflow
+                WHERE job_title = ? AND status != 'shortlisted'
+                AND candidate_email IN (SELECT value FROM json_each(?))
+            """, (job_title, json.dumps([c["candidate_email"] for c in candidates])))}
+
+            # A retried or overlapping campaign only refreshes workflows still at 'shortlisted'
+            conn.executemany("""
+                INSERT INTO candidate_workflow 
+                (candidate_email, candidate_name, job_title, score, status)
+                VALUES (?, ?, ?, ?, 'shortlisted')
+                ON CONFLICT(candidate_email, job_title) DO UPDATE SET
+                    candidate_name = excluded.candidate_name,
+                    score = excluded.score,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE candidate_workflow.status = 'shortlisted'
+            """, [(c["candidate_email"], c["candidate_name"], job_title, c["score"]) for c in candidates])
 
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                server.starttls()
-                server.login(FROM_EMAIL, APP_PASSWORD)
-                server.send_message(msg)
+            for position, (candidate, msg) in enumerate(zip(candidates, messages)):
+                if candidate["candidate_email"] in in_progress:
+                    results.append({"candidate_email": candidate["candidate_email"], "status": "skipped", "outbox_id": None})
+                    continue
+                outbox_id, queued = email_outbox.enqueue(
+                    msg,
+                    dedup_key=f"{self.campaign_key_prefix(campaign_id)}{candidate['candidate_email']}",
+                    not_before=start + position * interval
+                )
+                results.append({
+                    "candidate_email": candidate["candidate_email"],
+                    "status": "queued" if queued else "duplicate",
+                    "outbox_id": outbox_id
+                })
+        email_outbox.wake()
+        return results
+    
+    @staticmethod
+    def campaign_key_prefix(campaign_id: str) -> str:
+        return f"shortlist:{campaign_id}:"
+    
+    def get_campaign_progress(self, campaign_id: str) -> List[Dict]:
+        """Delivery state per candidate for a bulk shortlist campaign"""
+        return [
+            {
+                "candidate_email": row["to_email"],
+                "outbox_id": row["id"],
+                "status": row["status"],
+                "attempts": row["attempts"],
+                "last_error": row["last_error"],
+            }
+            for row in email_outbox.deliveries_by_key_prefix(self.campaign_key_prefix(campaign_id))
+        ]
+    
+    def _build_message(self, to_email: str, template: str, **context) -> MIMEMultipart:
+        return build_message(FROM_EMAIL, to_email, template, **context)
+    
+    def _send_email(self, to_email: str, template: str, dedup_key: Optional[str] = None, **context) -> bool:
+        """
+        Internal method to send email: queues it in the outbox, from which
+        background workers deliver it (with retries), so callers never wait
+        on SMTP. Returns False only if the message could not be queued.
+        """
+        try:
+            msg = self._build_message(to_email, template, **context)
+            _, queued = email_outbox.enqueue(msg, dedup_key=dedup_key)
             
-            print(f"✅ Email sent to {to_email}")
+            print(f"✅ Email {'queued' if queued else 'already queued'} for {to_email}")
             return True
             
         except Exception as e:
-            print(f"❌ Failed to send email: {e}")
+            print(f"❌ Failed to queue email: {e}")
             return False
 
 # Usage example
@@ -0,0 +1,376 @@
+import email
+import email.policy
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import parseaddr
+from typing import Dict, List, Optional, Tuple
+from backend.services import booking_db
+from backend.services.calendar_service import book_slots_bulk
+from backend.services.email_workflow_service import EmailWorkflowService
+from backend.services.lock_service import lock_slot, unlock_slot
+
+# Candidate replies are read from a local mailbox: a Maildir directory or an
+# mbox file, delivered by the mail server (or by fetchmail/getmail from an
+# IMAP account). Empty disables the inbound processor.
+INBOUND_MAILBOX = os.getenv("INBOUND_MAILBOX", "")
+INBOUND_POLL_SECONDS = float(os.getenv("INBOUND_POLL_SECONDS", "5"))
+# Replies per batch; the slot choices in a batch are booked with batched calendar calls
+INBOUND_BATCH_SIZE = int(os.getenv("INBOUND_BATCH_SIZE", "200"))
+
+workflow_service = EmailWorkflowService()
+
+_stop = threading.Event()
+_poller: Optional[threading.Thread] = None
+_poller_lock = threading.Lock()
+# One batch at a time per process (background poller vs the poll endpoint)
+_poll_lock = threading.Lock()
+_stats = {"batches": 0, "replies": 0, "already_processed": 0, "outcomes": {}, "last_poll_at": None}
+_stats_lock = threading.Lock()
+
+
+class MaildirSource:
+    """
+    Unread mail sits in new/; a processed message is moved to cur/ and
+    flagged seen. That move is the checkpoint: cur/ is never read again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = f"maildir:{os.path.abspath(path)}"
+        for sub in ("new", "cur", "tmp"):
+            os.makedirs(os.path.join(path, sub), exist_ok=True)
+
+    def read_batch(self, limit: int) -> Tuple[List[bytes], List[str]]:
+        new_dir = os.path.join(self.path, "new")
+        # Maildir names start with the delivery time, so this is arrival order
+        names = sorted(os.listdir(new_dir))[:limit]
+        messages = []
+        for name in names:
+            with open(os.path.join(new_dir, name), "rb") as f:
+                messages.append(f.read())
+        return messages, names
+
+    def commit(self, names: List[str]):
+        for name in names:
+            target = name if ":2," in name else f"{name}:2,S"
+            try:
+                os.rename(os.path.join(self.path, "new", name), os.path.join(self.path, "cur", target))
+            except FileNotFoundError:
+                pass  # moved by another reader
+
+
+class MboxSource:
+    """
+    Mail is appended to one file. The checkpoint is the byte offset after
+    the last processed message, kept in inbound_checkpoints with the file's
+    inode, so each poll reads only what arrived since. A new inode or a
+    shorter file (rotation) starts again from the top.
+    """
+
+    _FROM_LINE = re.compile(rb"^From ", re.MULTILINE)
+    _QUOTED_FROM = re.compile(rb"^>(>*From )", re.MULTILINE)
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = f"mbox:{os.path.abspath(path)}"
+
+    def _checkpoint(self) -> Dict:
+        row = booking_db.fetch_one("SELECT position FROM inbound_checkpoints WHERE source = ?", (self.name,))
+        return json.loads(row["position"]) if row else {"inode": None, "offset": 0}
+
+    def read_batch(self, limit: int) -> Tuple[List[bytes], Optional[Dict]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return [], None
+        checkpoint = self._checkpoint()
+        offset = checkpoint["offset"]
+        if checkpoint["inode"] != stat.st_ino or stat.st_size < offset:
+            offset = 0
+        if stat.st_size == offset:
+            return [], None
+
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read(stat.st_size - offset)
+
+        starts = [m.start() for m in self._FROM_LINE.finditer(data)]
+        # Each message ends where the next "From " line begins; the last one
+        # only counts once its trailing blank line is written
+        ends = starts[1:] + ([len(data)] if data.endswith(b"\n\n") else [])
+        messages, consumed = [], 0
+        for start, end in list(zip(starts, ends))[:limit]:
+            _, _, body = data[start:end].partition(b"\n")
+            messages.append(self._QUOTED_FROM.sub(rb"\1", body))
+            consumed = end
+        if not consumed:
+            return [], None
+        return messages, {"inode": stat.st_ino, "offset": offset + consumed}
+
+    def commit(self, position: Optional[Dict]):
+        if position is None:
+            return
+        booking_db.execute("""
+            INSERT INTO inbound_checkpoints (source, position, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET position = excluded.position, updated_at = excluded.updated_at
+        """, (self.name, json.dumps(position), time.time()))
+
+
+def open_source(path: str = ""):
+    """Maildir for a directory, mbox for a file (INBOUND_MAILBOX by default)"""
+    path = path or INBOUND_MAILBOX
+    if not path:
+        return None
+    return MaildirSource(path) if os.path.isdir(path) else MboxSource(path)
+
+
+# Where the quoted original starts in a reply ("On ... wrote:", Outlook headers)
+_QUOTE_START = re.compile(r"^\s*(On .+wrote:|-+\s*Original Message\s*-+|From:\s.+)\s*$", re.IGNORECASE | re.MULTILINE)
+
+def reply_text(msg: EmailMessage) -> str:
+    """
+    The candidate's own words: the plain-text (or tag-stripped HTML) body
+    without the quoted original, which repeats our slot numbers and dates
+    """
+    part = msg.get_body(preferencelist=("plain", "html"))
+    if part is None:
+        return ""
+    text = part.get_content()
+    if part.get_content_type() == "text/html":
+        text = html.unescape(re.sub(r"<[^>]+>", " ", text))
+    quote = _QUOTE_START.search(text)
+    if quote:
+        text = text[:quote.start()]
+    return "\n".join(line for line in text.splitlines() if not line.lstrip().startswith(">"))
+
+def _count(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+def _parse(raw: bytes) -> Dict:
+    msg = email.message_from_bytes(raw, policy=email.policy.default)
+    message_id = (msg.get("Message-ID") or "").strip() or "sha1:" + hashlib.sha1(raw).hexdigest()
+    reply = {"message_id": message_id, "from_email": parseaddr(msg.get("From", ""))[1], "text": None}
+    try:
+        reply["text"] = reply_text(msg)
+    except Exception as e:
+        reply["error"] = str(e)
+    return reply
+
+def _outcome(reply: Dict, outcome: str, workflow: Optional[Dict] = None, detail: Optional[str] = None) -> Dict:
+    return {
+        "message_id": reply["message_id"], "from_email": reply["from_email"],
+        "workflow_id": workflow["id"] if workflow else None, "outcome": outcome, "detail": detail
+    }
+
+def _offer(reply: Dict, workflow: Dict, interview_date: str) -> Dict:
+    # Keyed by the reply, so reprocessing the same message never emails twice
+    offered = workflow_service.offer_interview_slots(
+        workflow, interview_date, dedup_key=f"reply:{reply['message_id']}"
+    )
+    if not offered:
+        return _outcome(reply, "no_slots", workflow, interview_date)
+    return _outcome(reply, "slots_sent", workflow, interview_date)
+
+def _lock_for(reply: Dict, workflow: Dict, slot_time: str) -> bool:
+    """
+    Lock the slot and record the reply as 'pending' on it in one transaction,
+    so a crash before the outcome is recorded leaves a trace that this
+    message, not another candidate, holds the lock
+    """
+    with booking_db.transaction():
+        if not lock_slot(slot_time):
+            return False
+        booking_db.execute("""
+            INSERT INTO inbound_messages (message_id, source, from_email, workflow_id, outcome, detail, processed_at)
+            VALUES (?, ?, ?, ?, 'pending', ?, ?)
+            ON CONFLICT(message_id) DO UPDATE SET detail = excluded.detail, processed_at = excluded.processed_at
+        """, (reply["message_id"], reply["source"], reply["from_email"], workflow["id"], slot_time, time.time()))
+        return True
+
+def _book(choices: List[Tuple[Dict, Dict, str]], held: Dict[str, str]) -> List[Dict]:
+    """
+    Lock and book the chosen slots, batching the calendar inserts. held maps
+    the Message-IDs of replies interrupted mid-booking to the slot they had
+    locked; replaying one of those carries on with its own lock.
+    """
+    results, to_book = [], []
+    for reply, workflow, slot_time in choices:
+        if held.get(reply["message_id"]) == slot_time or _lock_for(reply, workflow, slot_time):
+            to_book.append((reply, workflow, slot_time))
+            continue
+        try:
+            # Someone else got it first: offer what is left that day
+            result = _offer(reply, workflow, workflow["interview_date"])
+            results.append(dict(result, outcome="slot_taken_reoffered" if result["outcome"] == "slots_sent" else "slot_taken"))
+        except Exception as e:
+            results.append(_outcome(reply, "slot_taken", workflow, str(e)))
+
+    try:
+        booked = book_slots_bulk([
+            {"candidate_name": workflow["candidate_name"], "candidate_email": workflow["candidate_email"], "slot_time": slot_time}
+            for _, workflow, slot_time in to_book
+        ]) if to_book else []
+    except Exception as e:
+        booked = [{"status": "failed", "error": str(e)} for _ in to_book]
+
+    for (reply, workflow, slot_time), booking in zip(to_book, booked):
+        if booking["status"] != "booked":
+            unlock_slot(slot_time)
+            results.append(_outcome(reply, "booking_failed", workflow, booking["error"]))
+            continue
+        # Confirmation, status and outcome commit together: a replay after this never books again
+        with booking_db.transaction():
+            workflow_service.send_confirmation_email(
+                workflow["candidate_email"], workflow["candidate_name"], slot_time, booking["meet_link"],
+                dedup_key=f"confirmation:{workflow['candidate_email']}:{slot_time}"
+            )
+            workflow_service.update_candidate_status(workflow["candidate_email"], "interview_scheduled", workflow["job_title"])
+            result = _outcome(reply, "booked", workflow, slot_time)
+            _record([result], reply["source"])
+        results.append(result)
+    return results
+
+def _record(results: List[Dict], source_name: str):
+    """Store final outcomes; a 'pending' row left by an interrupted booking is overwritten"""
+    now = time.time()
+    booking_db.get_connection().executemany("""
+        INSERT INTO inbound_messages (message_id, source, from_email, workflow_id, outcome, detail, processed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(message_id) DO UPDATE SET
+            workflow_id = excluded.workflow_id,
+            outcome = excluded.outcome,
+            detail = excluded.detail,
+            processed_at = excluded.processed_at
+        WHERE inbound_messages.outcome = 'pending'
+    """, [(r["message_id"], source_name, r["from_email"], r["workflow_id"], r["outcome"], r["detail"], now) for r in results])
+
+def process_replies(raw_messages: List[bytes], source_name: str = "api") -> List[Dict]:
+    """
+    Handle a batch of candidate replies and record the outcome of each.
+    A reply is matched to the sender's workflow that is waiting on them:
+    an availability date gets the day's slots emailed, a slot number on a
+    workflow with slots offered gets that slot booked and confirmed.
+    Messages already processed (by Message-ID) are skipped; one left
+    'pending' by a crash mid-booking is processed again on its own lock.
+    """
+    replies = [_parse(raw) for raw in raw_messages]
+    if not replies:
+        return []
+    for reply in replies:
+        reply["source"] = source_name
+    ids = list({r["message_id"] for r in replies})
+    placeholders = ",".join("?" * len(ids))
+    done, held = set(), {}
+    for row in booking_db.fetch_all(
+        f"SELECT message_id, outcome, detail FROM inbound_messages WHERE message_id IN ({placeholders})", ids
+    ):
+        if row["outcome"] == "pending":
+            held[row["message_id"]] = row["detail"]
+        else:
+            done.add(row["message_id"])
+
+    results, choices, seen, chosen = [], [], set(), set()
+    for reply in replies:
+        if reply["message_id"] in done or reply["message_id"] in seen:
+            _count("already_processed")
+            continue
+        seen.add(reply["message_id"])
+
+        if reply["text"] is None:
+            results.append(_outcome(reply, "unreadable", detail=reply.get("error")))
+            continue
+        workflow = workflow_service.get_awaiting_reply_workflow(reply["from_email"])
+        if workflow is None:
+            results.append(_outcome(reply, "unmatched"))
+            continue
+
+        try:
+            slot_number = workflow_service.parse_slot_selection_email(reply["text"]) if workflow["status"] == "slots_sent" else None
+            offered = json.loads(workflow["offered_slots"] or "[]")
+            if slot_number and slot_number <= len(offered):
+                if workflow["id"] in chosen:
+                    results.append(_outcome(reply, "duplicate_choice", workflow))
+                else:
+                    chosen.add(workflow["id"])
+                    choices.append((reply, workflow, offered[slot_number - 1]))
+                continue
+
+            # No usable slot number: a date (first reply, or asking for another day)
+            interview_date = workflow_service.parse_availability_email(reply["text"])
+            if interview_date:
+                results.append(_offer(reply, workflow, interview_date))
+            else:
+                results.append(_outcome(reply, "unparsed", workflow))
+        except Exception as e:
+            results.append(_outcome(reply, "error", workflow, str(e)))
+
+    results.extend(_book(choices, held))
+    _record(results, source_name)
+
+    with _stats_lock:
+        _stats["replies"] += len(results)
+        for r in results:
+            _stats["outcomes"][r["outcome"]] = _stats["outcomes"].get(r["outcome"], 0) + 1
+    return results
+
+def poll_once(source=None, limit: int = INBOUND_BATCH_SIZE) -> Dict:
+    """
+    Process the next batch of new mail and advance the checkpoint past it.
+    Returns {"read": messages taken from the mailbox, "results": outcomes}.
+    """
+    source = source or open_source()
+    if source is None:
+        return {"read": 0, "results": []}
+    with _poll_lock:
+        raw_messages, position = source.read_batch(limit)
+        results = process_replies(raw_messages, source.name) if raw_messages else []
+        # Only after the outcomes are recorded: a crash re-reads the batch, and
+        # the recorded Message-IDs make the second pass skip what was done
+        source.commit(position)
+    with _stats_lock:
+        _stats["batches"] += 1 if raw_messages else 0
+        _stats["last_poll_at"] = time.time()
+    return {"read": len(raw_messages), "results": results}
+
+def _poll_loop(source):
+    while not _stop.is_set():
+        try:
+            read = poll_once(source)["read"]
+        except Exception as e:
+            print(f"[INBOUND ERROR] {e}")
+            read = 0
+        # A full batch means there is a backlog: keep going without sleeping
+        if read < INBOUND_BATCH_SIZE:
+            _stop.wait(INBOUND_POLL_SECONDS)
+
+def start_poller():
+    """Start polling INBOUND_MAILBOX in the background (no-op when unset)"""
+    global _poller
+    with _poller_lock:
+        source = open_source()
+        if _poller is not None or source is None:
+            return
+        _stop.clear()
+        _poller = threading.Thread(target=_poll_loop, args=(source,), name="inbound-mail", daemon=True)
+        _poller.start()
+        print(f"[INBOUND] Polling {source.name} every {INBOUND_POLL_SECONDS}s")
+
+def stop_poller(timeout: float = 10):
+    global _poller
+    with _poller_lock:
+        _stop.set()
+        if _poller is not None:
+            _poller.join(timeout)
+        _poller = None
+
+def inbound_stats() -> Dict:
+    with _stats_lock:
+        stats = {**_stats, "outcomes": dict(_stats["outcomes"])}
+    return {**stats, "mailbox": INBOUND_MAILBOX or None, "polling": _poller is not None}
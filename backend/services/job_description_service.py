@@ -1,14 +1,14 @@
-from backend.llm.llm_setup import get_job_description_chain
+from backend.llm.llm_setup import get_job_description_chain, run_chain
 from backend.models.job_description import JobDescriptionRequest
 
 def generate_job_description(request: JobDescriptionRequest) -> str:
     chain = get_job_description_chain()
-    response = chain.run({
+    response = run_chain(chain, {
         "job_title": request.job_title,
         "department": request.department,
         "responsibilities": request.responsibilities,
         "skills_required": request.skills_required,
         "location": request.location,
         "experience_level": request.experience_level
-    })
+    }, use_cache=request.use_cache)
     return response.strip()
@@ -1,28 +1,11 @@
-from backend.llm.llm_setup import get_llm
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+from backend.llm.llm_setup import get_persona_chain, run_chain, arun_chain
 
-def generate_persona_from_resume(resume_text: str) -> str:
-    prompt = PromptTemplate(
-        input_variables=["resume_text"],
-        template="""
-You're an AI hiring assistant. Given the following resume text, generate a structured candidate persona summary.
-
-Include:
-- Name (if identifiable)
-- Profession / Title
-- Years of experience
-- Key skills and technologies
-- Personality traits or strengths
-- Suggested/ideal roles
-
-Resume:
-{resume_text}
-
-Respond in clean markdown format.
-"""
-    )
+def generate_persona_from_resume(resume_text: str, use_cache: bool = True) -> str:
+    chain = get_persona_chain()
+    result = run_chain(chain, {"resume_text": resume_text}, use_cache=use_cache)
+    return result.strip()
 
-    chain = LLMChain(llm=get_llm(), prompt=prompt)
-    result = chain.run({"resume_text": resume_text})
+async def agenerate_persona_from_resume(resume_text: str, use_cache: bool = True) -> str:
+    chain = get_persona_chain()
+    result = await arun_chain(chain, {"resume_text": resume_text}, use_cache=use_cache)
     return result.strip()
@@ -0,0 +1,70 @@
+import os
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List
+import numpy as np
+
+# Hashed TF-IDF: fixed-width vectors, no vocabulary to fit or persist, no network
+N_FEATURES = int(os.getenv("PREFILTER_FEATURES", str(2 ** 13)))
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9+#.]*[a-z0-9+#]|[a-z]")
+
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this
+to was we were will with you your i me my he she they them who which what when where how
+all any can do does done into not no yes so than then there these those over under about
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+@lru_cache(maxsize=200000)
+def _feature_index(token: str, n_features: int) -> int:
+    # crc32 rather than hash(): stable across processes, so stored vectors stay valid
+    return zlib.crc32(token.encode("utf-8")) % n_features
+
+
+def term_frequencies(texts: List[str], n_features: int = N_FEATURES) -> np.ndarray:
+    """Sublinear (1 + log tf) hashed term frequencies, one row per text"""
+    matrix = np.zeros((len(texts), n_features), dtype=np.float32)
+    for row, text in enumerate(texts):
+        indices = [_feature_index(token, n_features) for token in tokenize(text)]
+        if indices:
+            columns, counts = np.unique(indices, return_counts=True)
+            matrix[row, columns] = 1.0 + np.log(counts)
+    return matrix
+
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def rank_resumes(resume_texts: List[str], job_description: str) -> List[Dict]:
+    """
+    Rank resumes by TF-IDF cosine similarity to the job description.
+    IDF is computed over the resumes plus the JD. Returns
+    [{"index", "similarity"}] sorted best first.
+    """
+    if not resume_texts:
+        return []
+
+    tf = term_frequencies(resume_texts + [job_description])
+    document_frequency = np.count_nonzero(tf, axis=0)
+    idf = np.log((1 + tf.shape[0]) / (1 + document_frequency)) + 1.0
+    tfidf = l2_normalize(tf * idf)
+
+    similarities = tfidf[:-1] @ tfidf[-1]
+    order = np.argsort(-similarities, kind="stable")
+    return [{"index": int(i), "similarity": round(float(similarities[i]), 4)} for i in order]
+
+
+def shortlist_top_k(resume_texts: List[str], job_description: str, top_k: int) -> List[Dict]:
+    """rank_resumes with a "shortlisted" flag on the best top_k entries"""
+    ranking = rank_resumes(resume_texts, job_description)
+    for position, entry in enumerate(ranking):
+        entry["shortlisted"] = position < top_k
+    return ranking
@@ -0,0 +1,258 @@
+import abc
+import bisect
+import datetime
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+import pytz
+from pydantic import BaseModel
+from backend.utils.ics_tools import parse_ics_events
+
+Interval = Tuple[datetime.datetime, datetime.datetime]
+
+
+def _parse_clock(value: str) -> datetime.time:
+    return datetime.datetime.strptime(value.strip(), "%H:%M").time()
+
+
+def _parse_breaks(value: str) -> List[Tuple[datetime.time, datetime.time]]:
+    """"13:00-14:00,16:30-16:45" -> [(13:00, 14:00), (16:30, 16:45)]"""
+    breaks = []
+    for part in value.split(","):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            breaks.append((_parse_clock(start), _parse_clock(end)))
+    return breaks
+
+
+class SlotConfig(BaseModel):
+    """Working-hours rules that turn busy times into bookable interview slots"""
+    timezone: str = "Asia/Kolkata"
+    work_start: datetime.time = datetime.time(10, 0)
+    work_end: datetime.time = datetime.time(19, 0)
+    slot_duration: int = 30  # minutes
+    buffer_minutes: int = 0  # free gap required before and after existing meetings
+    breaks: List[Tuple[datetime.time, datetime.time]] = []  # e.g. lunch
+    working_days: List[int] = [0, 1, 2, 3, 4, 5, 6]  # Monday = 0
+
+    @classmethod
+    def from_env(cls) -> "SlotConfig":
+        return cls(
+            timezone=os.getenv("SLOT_TIMEZONE", "Asia/Kolkata"),
+            work_start=_parse_clock(os.getenv("SLOT_WORK_START", "10:00")),
+            work_end=_parse_clock(os.getenv("SLOT_WORK_END", "19:00")),
+            slot_duration=int(os.getenv("SLOT_DURATION_MINUTES", "30")),
+            buffer_minutes=int(os.getenv("SLOT_BUFFER_MINUTES", "0")),
+            breaks=_parse_breaks(os.getenv("SLOT_BREAKS", "")),
+            working_days=[int(d) for d in os.getenv("SLOT_WORKING_DAYS", "0,1,2,3,4,5,6").split(",")],
+        )
+
+
+def merge_busy_intervals(intervals: List[Interval], padding: datetime.timedelta = datetime.timedelta(0)) -> List[Interval]:
+    """
+    Sort (start, end) intervals, widen each by padding on both sides and
+    merge overlapping or touching ones.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        start, end = start - padding, end + padding
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def parse_busy(busy_times: List[Dict]) -> List[Interval]:
+    """Google-style [{"start": iso, "end": iso}] -> [(start, end)] datetimes"""
+    return [
+        (datetime.datetime.fromisoformat(b['start']), datetime.datetime.fromisoformat(b['end']))
+        for b in busy_times
+    ]
+
+
+def free_slots_sweep(window_start: datetime.datetime, window_end: datetime.datetime,
+                     merged_busy: List[Interval], slot_duration: int = 30) -> List[Interval]:
+    """
+    Fixed-length slots in [window_start, window_end) that avoid every busy
+    interval. merged_busy must be sorted and non-overlapping (see
+    merge_busy_intervals). The first relevant interval is found by binary
+    search and a single pointer then walks the list alongside the slots, so a
+    call costs O(log busy + slots it passes) even when merged_busy spans far
+    more than the window (one busy list shared by every day of a range).
+    """
+    step = datetime.timedelta(minutes=slot_duration)
+    i = bisect.bisect_right(merged_busy, window_start, key=lambda interval: interval[1])
+    slots = []
+    current = window_start
+    while current + step <= window_end:
+        slot_end = current + step
+        while i < len(merged_busy) and merged_busy[i][1] <= current:
+            i += 1
+        if i == len(merged_busy) or merged_busy[i][0] >= slot_end:
+            slots.append((current, slot_end))
+        current = slot_end
+    return slots
+
+
+class BusyProvider(abc.ABC):
+    """Source of busy intervals for one or more calendars"""
+
+    @abc.abstractmethod
+    def get_busy(self, calendar_ids: List[str], time_min: datetime.datetime,
+                 time_max: datetime.datetime) -> Dict[str, List[Interval]]:
+        """calendar_id -> busy (start, end) intervals overlapping [time_min, time_max)"""
+
+
+class InMemoryBusyProvider(BusyProvider):
+    """Busy times held in memory: for tests, load tests and offline demos"""
+
+    def __init__(self, busy: Optional[Dict[str, List[Interval]]] = None):
+        self._busy = {calendar_id: list(intervals) for calendar_id, intervals in (busy or {}).items()}
+        self._lock = threading.Lock()
+
+    def add_busy(self, calendar_id: str, start: datetime.datetime, end: datetime.datetime):
+        with self._lock:
+            self._busy.setdefault(calendar_id, []).append((start, end))
+
+    def get_busy(self, calendar_ids, time_min, time_max):
+        with self._lock:
+            return {
+                calendar_id: [
+                    (start, end) for start, end in self._busy.get(calendar_id, [])
+                    if start < time_max and end > time_min
+                ]
+                for calendar_id in calendar_ids
+            }
+
+
+class ICSBusyProvider(BusyProvider):
+    """
+    Busy times from local .ics files, one per calendar id (a single path is
+    used for every calendar). Files are re-read only when they change.
+    """
+
+    def __init__(self, paths, default_tz: str = "UTC"):
+        self.paths = paths
+        self.default_tz = default_tz
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _path_for(self, calendar_id: str) -> str:
+        return self.paths if isinstance(self.paths, str) else self.paths[calendar_id]
+
+    def _events(self, path: str) -> List[Interval]:
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        with open(path) as f:
+            events = [
+                (e["start"], e["end"]) for e in parse_ics_events(f.read(), self.default_tz)
+                if not e["transparent"]
+            ]
+        with self._lock:
+            self._cache[path] = (mtime, events)
+        return events
+
+    def get_busy(self, calendar_ids, time_min, time_max):
+        return {
+            calendar_id: [
+                (start, end) for start, end in self._events(self._path_for(calendar_id))
+                if start < time_max and end > time_min
+            ]
+            for calendar_id in calendar_ids
+        }
+
+
+class SlotEngine:
+    """
+    Computes bookable slots from a BusyProvider and a SlotConfig.
+    One freebusy lookup covers the whole date range and every calendar;
+    each day is then a linear sweep over merged busy times.
+    """
+
+    def __init__(self, provider: BusyProvider, config: Optional[SlotConfig] = None):
+        self.provider = provider
+        self.config = config or SlotConfig()
+
+    @property
+    def tz(self):
+        return pytz.timezone(self.config.timezone)
+
+    def day_window(self, day: datetime.date) -> Interval:
+        return (
+            self.tz.localize(datetime.datetime.combine(day, self.config.work_start)),
+            self.tz.localize(datetime.datetime.combine(day, self.config.work_end)),
+        )
+
+    def _break_intervals(self, day: datetime.date) -> List[Interval]:
+        return [
+            (self.tz.localize(datetime.datetime.combine(day, start)),
+             self.tz.localize(datetime.datetime.combine(day, end)))
+            for start, end in self.config.breaks
+        ]
+
+    def _blocked(self, intervals: List[Interval], days: List[datetime.date]) -> List[Interval]:
+        """Busy times padded by the buffer, plus breaks (which are not padded), merged"""
+        padding = datetime.timedelta(minutes=self.config.buffer_minutes)
+        padded = merge_busy_intervals(intervals, padding)
+        breaks = [b for day in days for b in self._break_intervals(day)]
+        return merge_busy_intervals(padded + breaks)
+
+    def free_slots_between(self, window_start: datetime.datetime, window_end: datetime.datetime,
+                           calendar_id: str) -> List[Interval]:
+        """Slots for one calendar inside an arbitrary window (ignores working hours)"""
+        busy = self.provider.get_busy([calendar_id], window_start, window_end)[calendar_id]
+        days = [window_start.astimezone(self.tz).date(), window_end.astimezone(self.tz).date()]
+        blocked = self._blocked(busy, sorted(set(days)))
+        return free_slots_sweep(window_start, window_end, blocked, self.config.slot_duration)
+
+    def available_slots(self, from_date: datetime.date, to_date: datetime.date,
+                        calendar_ids: List[str], min_free: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """
+        Per-day slots where at least min_free of calendar_ids (default: all)
+        are free. Returns {"YYYY-MM-DD": [{"start", "end", "free_calendars"}]}
+        with timezone-aware datetimes.
+        """
+        if to_date < from_date:
+            raise ValueError("'to' date must not be before 'from' date")
+        required = len(calendar_ids) if min_free is None else max(1, min(min_free, len(calendar_ids)))
+
+        days = [from_date + datetime.timedelta(days=i) for i in range((to_date - from_date).days + 1)]
+        working = [d for d in days if d.weekday() in self.config.working_days]
+        result = {d.strftime("%Y-%m-%d"): [] for d in days}
+        if not working:
+            return result
+
+        range_start = self.day_window(working[0])[0]
+        range_end = self.day_window(working[-1])[1]
+        busy = self.provider.get_busy(calendar_ids, range_start, range_end)
+
+        if required == len(calendar_ids):
+            # Everyone must be free: one sweep per day over the union of all busy times
+            blocked = self._blocked([i for c in calendar_ids for i in busy[c]], working)
+            for day in working:
+                window_start, window_end = self.day_window(day)
+                result[day.strftime("%Y-%m-%d")] = [
+                    {"start": start, "end": end, "free_calendars": list(calendar_ids)}
+                    for start, end in free_slots_sweep(window_start, window_end, blocked, self.config.slot_duration)
+                ]
+            return result
+
+        blocked_by_calendar = {c: self._blocked(busy[c], working) for c in calendar_ids}
+        for day in working:
+            window_start, window_end = self.day_window(day)
+            free_by_slot = {}
+            for calendar_id in calendar_ids:
+                for slot in free_slots_sweep(window_start, window_end, blocked_by_calendar[calendar_id],
+                                             self.config.slot_duration):
+                    free_by_slot.setdefault(slot, []).append(calendar_id)
+            result[day.strftime("%Y-%m-%d")] = [
+                {"start": start, "end": end, "free_calendars": free}
+                for (start, end), free in sorted(free_by_slot.items())
+                if len(free) >= required
+            ]
+        return result
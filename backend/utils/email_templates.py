@@ -0,0 +1,66 @@
+import os
+import threading
+import uuid
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, Tuple
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, select_autoescape
+
+# Every email is three templates in TEMPLATE_DIR: <name>.subject.txt,
+# <name>.txt (plain-text part) and <name>.html (HTML part). Only .html is
+# autoescaped, so candidate-supplied names and links cannot inject markup.
+TEMPLATE_DIR = os.getenv(
+    "EMAIL_TEMPLATE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "email")
+)
+EMAIL_TEMPLATES = ("shortlisting", "slot_selection", "confirmation", "slot_list")
+
+_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+    undefined=StrictUndefined,  # a missing variable is a bug, not an empty string in a sent email
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,  # compiled once; no stat() per render
+)
+_compiled: Dict[str, Tuple[Template, Template, Template]] = {}
+_compile_lock = threading.Lock()
+
+def load_templates() -> int:
+    """Compile every email template (app startup); returns how many emails are ready"""
+    with _compile_lock:
+        for name in EMAIL_TEMPLATES:
+            if name not in _compiled:
+                _compiled[name] = (
+                    _env.get_template(f"{name}.subject.txt"),
+                    _env.get_template(f"{name}.txt"),
+                    _env.get_template(f"{name}.html"),
+                )
+    return len(_compiled)
+
+def _templates(name: str) -> Tuple[Template, Template, Template]:
+    templates = _compiled.get(name)
+    if templates is None:
+        load_templates()
+        templates = _compiled.get(name)
+        if templates is None:
+            raise KeyError(f"Unknown email template: {name}")
+    return templates
+
+def render_email(name: str, **context) -> Tuple[str, str, str]:
+    """Render one email to (subject, plain text, HTML)"""
+    subject, text, html = _templates(name)
+    return subject.render(context).strip(), text.render(context), html.render(context)
+
+def build_message(from_email: str, to_email: str, name: str, **context) -> MIMEMultipart:
+    """multipart/alternative message: plain text first, HTML last (preferred by capable clients)"""
+    subject, text, html = render_email(name, **context)
+    # utf-8 parts are base64, which never contains "_": a fixed-shape boundary
+    # cannot collide, and setting it skips the generator's per-message scan
+    msg = MIMEMultipart("alternative", boundary=f"=_{uuid.uuid4().hex}")
+    msg["From"] = from_email
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg.attach(MIMEText(text, "plain", "utf-8"))
+    msg.attach(MIMEText(html, "html", "utf-8"))
+    return msg
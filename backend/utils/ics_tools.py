@@ -0,0 +1,133 @@
+import datetime
+import re
+from typing import Dict, List, Optional, Tuple
+import pytz
+
+
+class ICSParseError(ValueError):
+    """A property that could not be parsed; the message names the line"""
+
+
+def _unfold(text: str) -> List[Tuple[int, str]]:
+    """
+    Undo RFC 5545 line folding (continuation lines start with a space or
+    tab); returns (line number where the logical line starts, line)
+    """
+    lines = []
+    for number, raw in enumerate(text.splitlines(), start=1):
+        if raw[:1] in (" ", "\t") and lines:
+            lines[-1] = (lines[-1][0], lines[-1][1] + raw[1:])
+        else:
+            lines.append((number, raw))
+    return lines
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\(.)", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _timezone(tzid: Optional[str], default_tz: str):
+    """
+    pytz zone for a TZID parameter (quoted values allowed, as in RFC 5545).
+    Names pytz does not know (Windows zones such as "India Standard Time",
+    custom VTIMEZONE ids) fall back to default_tz.
+    """
+    if tzid:
+        try:
+            return pytz.timezone(tzid.strip('"'))
+        except pytz.UnknownTimeZoneError:
+            pass
+    return pytz.timezone(default_tz)
+
+
+def _parse_datetime(value: str, params: Dict[str, str], default_tz: str) -> datetime.datetime:
+    value = value.strip()
+    if "T" not in value:
+        date_obj = datetime.datetime.strptime(value, "%Y%m%d")
+        return pytz.timezone(default_tz).localize(date_obj)
+    if value.endswith("Z"):
+        return datetime.datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=datetime.timezone.utc)
+    naive = datetime.datetime.strptime(value, "%Y%m%dT%H%M%S")
+    return _timezone(params.get("TZID"), default_tz).localize(naive)
+
+
+def parse_ics_events(text: str, default_tz: str = "UTC") -> List[Dict]:
+    """
+    Minimal VEVENT reader: returns [{"uid", "summary", "start", "end",
+    "transparent"}] with timezone-aware datetimes. Floating times use
+    default_tz. Recurrence rules are not expanded. Raises ICSParseError
+    for a DTSTART/DTEND that is not a valid date or date-time.
+    """
+    events = []
+    current: Optional[Dict] = None
+
+    for number, line in _unfold(text):
+        if line == "BEGIN:VEVENT":
+            current = {"uid": None, "summary": "", "start": None, "end": None, "transparent": False}
+            continue
+        if line == "END:VEVENT":
+            if current and current["start"]:
+                if current["end"] is None:
+                    current["end"] = current["start"] + datetime.timedelta(days=1)
+                events.append(current)
+            current = None
+            continue
+        if current is None or ":" not in line:
+            continue
+
+        name_part, value = line.split(":", 1)
+        name, *param_parts = name_part.split(";")
+        params = dict(p.split("=", 1) for p in param_parts if "=" in p)
+
+        if name in ("DTSTART", "DTEND"):
+            try:
+                current["start" if name == "DTSTART" else "end"] = _parse_datetime(value, params, default_tz)
+            except ValueError as e:
+                raise ICSParseError(f"Line {number}: {line!r}: {e}")
+        elif name == "UID":
+            current["uid"] = value
+        elif name == "SUMMARY":
+            current["summary"] = _unescape(value)
+        elif name == "TRANSP":
+            current["transparent"] = value.upper() == "TRANSPARENT"
+
+    return events
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> List[str]:
+    """RFC 5545 folding: 75-character lines, continuations start with a space"""
+    parts = [line[:75]]
+    for i in range(75, len(line), 74):
+        parts.append(" " + line[i:i + 74])
+    return parts
+
+
+def _format_utc(value: datetime.datetime) -> str:
+    return value.astimezone(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def events_to_ics(events: List[Dict], prodid: str = "-//interview-scheduler//local calendar//EN") -> str:
+    """
+    Inverse of parse_ics_events: serialise [{"uid", "summary", "start",
+    "end", "transparent"}] (aware datetimes) as a VCALENDAR, times in UTC.
+    """
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{prodid}"]
+    stamp = _format_utc(datetime.datetime.now(datetime.timezone.utc))
+    for event in events:
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{event['uid']}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_format_utc(event['start'])}",
+            f"DTEND:{_format_utc(event['end'])}",
+        ]
+        lines += _fold(f"SUMMARY:{_escape(event.get('summary') or '')}")
+        if event.get("transparent"):
+            lines.append("TRANSP:TRANSPARENT")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
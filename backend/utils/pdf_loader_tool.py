@@ -1,32 +1,187 @@
-from langchain_community.document_loaders import PyMuPDFLoader
-from pdf2image import convert_from_path
+from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Tuple
+from PIL import Image
+from backend.utils.resume_text_cache import resume_sha256, get_cached_text, store_text
+import asyncio
+import fitz  # PyMuPDF
+import io
+import multiprocessing
 import pytesseract
+import threading
 import os
 
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(8, (os.cpu_count() or 1) + 2))))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+# Stop OCR once this many characters have been recognised (0 = OCR every empty page)
+OCR_MIN_CHARS = int(os.getenv("OCR_MIN_CHARS", "0"))
+
+# Shared pool for PDF parsing so bulk uploads never spawn unbounded threads
+pdf_executor = ThreadPoolExecutor(max_workers=PDF_WORKERS, thread_name_prefix="pdf")
+
+_ocr_executor = None
+_ocr_executor_lock = threading.Lock()
+
+def get_ocr_executor() -> ProcessPoolExecutor:
+    """Process pool for tesseract; spawn avoids forking the threaded server process"""
+    global _ocr_executor
+    if _ocr_executor is None:
+        with _ocr_executor_lock:
+            if _ocr_executor is None:
+                _ocr_executor = ProcessPoolExecutor(
+                    max_workers=OCR_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _ocr_executor
+
+def _ocr_png(png: bytes) -> str:
+    with Image.open(io.BytesIO(png)) as image:
+        return pytesseract.image_to_string(image)
+
+def ocr_pages(page_numbers: Iterable[int], render_page: Callable[[int], bytes],
+              min_chars: int = OCR_MIN_CHARS) -> Dict[int, str]:
+    """
+    OCR pages across the process pool while rasterising them one at a time.
+    At most OCR_WORKERS rendered pages are held in memory, and no new pages are
+    rendered once min_chars characters have been recognised.
+    Returns {page_number: text}.
+    """
+    executor = get_ocr_executor()
+    results = {}
+    in_flight = []
+    total_chars = 0
+
+    def collect_oldest():
+        nonlocal total_chars
+        page_number, future = in_flight.pop(0)
+        text = future.result()
+        results[page_number] = text
+        total_chars += len(text.strip())
+
+    for page_number in page_numbers:
+        if min_chars and total_chars >= min_chars:
+            break
+        in_flight.append((page_number, executor.submit(_ocr_png, render_page(page_number))))
+        if len(in_flight) >= OCR_WORKERS:
+            collect_oldest()
+
+    while in_flight:
+        if min_chars and total_chars >= min_chars:
+            for _, future in in_flight:
+                future.cancel()
+            break
+        collect_oldest()
+
+    return results
+
+def _extract_document_text(doc: fitz.Document, dpi: int = OCR_DPI) -> Tuple[str, bool]:
+    """extract_document_text plus whether every page it needed to OCR was OCRed"""
+    pages = [page.get_text() for page in doc]
+    empty_pages = [i for i, text in enumerate(pages) if not text.strip()]
+    complete = True
+
+    if empty_pages:
+        print(f"[OCR] {len(empty_pages)} of {len(pages)} pages have no text. Running OCR...")
+        render = lambda i: doc[i].get_pixmap(dpi=dpi).tobytes("png")
+        try:
+            for i, text in ocr_pages(empty_pages, render).items():
+                pages[i] = text
+        except Exception as e:
+            print(f"[OCR ERROR]: {e}")
+            complete = False
+
+    return " ".join(pages), complete
+
+def extract_document_text(doc: fitz.Document, dpi: int = OCR_DPI) -> str:
+    """
+    Extract text page by page with PyMuPDF and OCR only the pages that came
+    back empty (scanned pages), rendering each at the configured DPI.
+    """
+    return _extract_document_text(doc, dpi)[0]
+
 def load_pdf_text(file_path: str) -> str:
     try:
-        # Try extracting text normally using PyMuPDF
-        loader = PyMuPDFLoader(file_path)
-        documents = loader.load()
-        content = " ".join([doc.page_content for doc in documents])
-        
-        if content.strip():
-            return content
-        else:
-            print("[OCR] No text found. Running OCR...")
-            return ocr_fallback(file_path)
-        
+        # Extract text with PyMuPDF, falling back to OCR for scanned pages
+        with fitz.open(file_path) as doc:
+            return extract_document_text(doc)
+
     except Exception as e:
         print(f"[ERROR] PDF Load failed: {e}")
         return ocr_fallback(file_path)
 
-def ocr_fallback(file_path: str) -> str:
+def _text_cache_key(sha256: str) -> str:
+    # OCR settings change the output (resolution, early stop), so they are part of the key
+    return f"{sha256}:dpi={OCR_DPI}:min_chars={OCR_MIN_CHARS}"
+
+def load_pdf_text_from_bytes(data: bytes) -> str:
+    """
+    Extract text from an in-memory PDF without writing it to disk.
+    Results are cached by the SHA-256 of the bytes (and the OCR settings), so
+    a resume uploaded again skips PyMuPDF and OCR entirely. Only complete
+    extractions are cached: a failed OCR run is retried on the next upload.
+    """
+    key = _text_cache_key(resume_sha256(data))
+    cached = get_cached_text(key)
+    if cached is not None:
+        return cached
+
+    try:
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            text, complete = _extract_document_text(doc)
+    except Exception as e:
+        print(f"[ERROR] PDF Load failed: {e}")
+        try:
+            text, complete = _ocr_all_pages_from_bytes(data), True
+        except Exception as e:
+            print(f"[OCR ERROR]: {e}")
+            text, complete = "", False
+
+    if complete:
+        store_text(key, text)
+    return text
+
+async def aload_pdf_text_from_bytes(data: bytes) -> str:
+    """Run PDF parsing (and any OCR fallback) on the bounded PDF pool, off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pdf_executor, load_pdf_text_from_bytes, data)
+
+def extract_pdf_item(filename: str, data: bytes) -> Tuple[str, str, str]:
+    """
+    Extract text for one uploaded PDF without raising.
+    Returns (filename, text, error); error is "" on success.
+    """
     try:
-        images = convert_from_path(file_path)
-        text = ""
-        for image in images:
-            text += pytesseract.image_to_string(image)
-        return text
+        text = load_pdf_text_from_bytes(data)
+        if not text.strip():
+            return filename, "", "No text could be extracted"
+        return filename, text, ""
+    except Exception as e:
+        return filename, "", str(e)
+
+def ocr_fallback(file_path: str, dpi: int = OCR_DPI) -> str:
+    """OCR a PDF PyMuPDF could not open, rasterising one page at a time with poppler"""
+    try:
+        page_count = pdfinfo_from_path(file_path)["Pages"]
+        render = lambda i: _image_to_png(
+            convert_from_path(file_path, dpi=dpi, first_page=i + 1, last_page=i + 1)[0]
+        )
+        texts = ocr_pages(range(page_count), render)
+        return "".join(texts[i] for i in sorted(texts))
     except Exception as e:
         print(f"[OCR ERROR]: {e}")
         return ""
+
+def _ocr_all_pages_from_bytes(data: bytes, dpi: int = OCR_DPI) -> str:
+    """In-memory counterpart of ocr_fallback; raises, so callers can tell a failure from an empty PDF"""
+    page_count = pdfinfo_from_bytes(data)["Pages"]
+    render = lambda i: _image_to_png(
+        convert_from_bytes(data, dpi=dpi, first_page=i + 1, last_page=i + 1)[0]
+    )
+    texts = ocr_pages(range(page_count), render)
+    return "".join(texts[i] for i in sorted(texts))
+
+def _image_to_png(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
@@ -0,0 +1,34 @@
+import hashlib
+import os
+from typing import Optional
+from backend.utils.sqlite_cache import SQLiteCache
+
+RESUME_TEXT_CACHE_DB_PATH = os.getenv("RESUME_TEXT_CACHE_DB_PATH", "db/resume_text_cache.db")
+RESUME_TEXT_CACHE_MAX_BYTES = int(os.getenv("RESUME_TEXT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Extracted text (including OCR output) keyed by the SHA-256 of the PDF bytes
+# and the OCR settings. No TTL: the same bytes and settings always yield the
+# same text, so only LRU/size eviction applies; callers store complete
+# extractions only.
+resume_text_cache = SQLiteCache(
+    RESUME_TEXT_CACHE_DB_PATH,
+    table="resume_text",
+    max_bytes=RESUME_TEXT_CACHE_MAX_BYTES,
+)
+
+
+def resume_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_cached_text(key: str) -> Optional[str]:
+    return resume_text_cache.get(key)
+
+
+def store_text(key: str, text: str):
+    if text.strip():
+        resume_text_cache.set(key, text)
+
+
+def resume_text_cache_stats() -> dict:
+    return resume_text_cache.stats()
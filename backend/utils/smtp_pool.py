@@ -0,0 +1,209 @@
+import atexit
+import os
+import smtplib
+import ssl
+import threading
+import time
+from email.message import Message
+from typing import Optional
+
+# Outbound mail settings shared by every sender. TLS and login are optional
+# so a local test server (e.g. aiosmtpd on localhost:8025, SMTP_SECURITY=none) works.
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_SECURITY = os.getenv("SMTP_SECURITY", "starttls").lower()  # starttls, ssl or none
+SMTP_USER = os.getenv("SMTP_USER", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+# Servers (Gmail included) limit messages per session; reconnect before hitting it
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+# Idle connections are probed with NOOP before reuse, and closed after SMTP_MAX_IDLE_SECONDS
+SMTP_KEEPALIVE_CHECK_SECONDS = float(os.getenv("SMTP_KEEPALIVE_CHECK_SECONDS", "30"))
+SMTP_MAX_IDLE_SECONDS = float(os.getenv("SMTP_MAX_IDLE_SECONDS", "240"))
+
+# Errors that mean the session is unusable, as opposed to a rejected message
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError, ssl.SSLError)
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """
+    Thread-safe pool of logged-in SMTP sessions. At most `size` sessions
+    are open at once; each is reused for up to max_messages_per_connection
+    messages, probed with NOOP after sitting idle, and replaced
+    transparently if the server dropped it.
+    """
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, security: str = SMTP_SECURITY,
+                 username: str = SMTP_USER, password: str = SMTP_PASSWORD, size: int = SMTP_POOL_SIZE,
+                 max_messages_per_connection: int = SMTP_MAX_MESSAGES_PER_CONNECTION,
+                 timeout: float = SMTP_TIMEOUT_SECONDS):
+        if security not in ("starttls", "ssl", "none"):
+            raise ValueError(f"Unknown SMTP security mode: {security}")
+        self.host = host
+        self.port = port
+        self.security = security
+        self.username = username
+        self.password = password
+        self.size = size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stats = {"connections_opened": 0, "connections_closed": 0, "reconnects": 0,
+                       "messages_sent": 0, "send_failures": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _connect(self) -> _PooledConnection:
+        context = ssl.create_default_context()
+        if self.security == "ssl":
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=context)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.security == "starttls":
+                smtp.starttls(context=context)
+                smtp.ehlo()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        self._count("connections_opened")
+        return _PooledConnection(smtp)
+
+    def _close(self, smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+        self._count("connections_closed")
+
+    def _is_alive(self, conn: _PooledConnection) -> bool:
+        idle = time.monotonic() - conn.last_used
+        if idle > SMTP_MAX_IDLE_SECONDS:
+            return False
+        if idle < SMTP_KEEPALIVE_CHECK_SECONDS:
+            return True
+        try:
+            return conn.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._is_alive(conn):
+                return conn
+            self._close(conn.smtp)
+
+    def _checkin(self, conn: _PooledConnection):
+        if conn.sent >= self.max_messages_per_connection:
+            self._close(conn.smtp)
+            return
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(conn)
+
+    def send(self, msg: Message, retries: int = 1):
+        """
+        Send one message over a pooled session. If the session turns out to
+        be dead it is replaced and the send retried (up to `retries` times);
+        rejections from a healthy server (bad recipient, etc.) raise at once.
+        """
+        self._slots.acquire()
+        try:
+            attempt = 0
+            while True:
+                conn = self._checkout()
+                try:
+                    conn.smtp.send_message(msg)
+                except _CONNECTION_ERRORS:
+                    self._close(conn.smtp)
+                    if attempt >= retries:
+                        self._count("send_failures")
+                        raise
+                    attempt += 1
+                    self._count("reconnects")
+                    continue
+                except smtplib.SMTPResponseException as e:
+                    # 421: server is closing the session; anything else leaves it usable
+                    if e.smtp_code == 421:
+                        self._close(conn.smtp)
+                        if attempt < retries:
+                            attempt += 1
+                            self._count("reconnects")
+                            continue
+                    else:
+                        self._checkin(conn)
+                    self._count("send_failures")
+                    raise
+                except smtplib.SMTPRecipientsRefused:
+                    # smtplib already reset the transaction; the session is fine
+                    self._checkin(conn)
+                    self._count("send_failures")
+                    raise
+                except Exception:
+                    self._close(conn.smtp)
+                    self._count("send_failures")
+                    raise
+                conn.sent += 1
+                self._count("messages_sent")
+                self._checkin(conn)
+                return
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._close(conn.smtp)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "idle_connections": len(self._idle), "pool_size": self.size}
+
+
+_pool: Optional[SMTPPool] = None
+_pool_lock = threading.Lock()
+
+def get_smtp_pool() -> SMTPPool:
+    """Process-wide pool configured from the SMTP_* environment variables"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SMTPPool()
+                atexit.register(_pool.close)
+    return _pool
+
+def set_smtp_pool(pool: Optional[SMTPPool]):
+    """Swap the shared pool (e.g. one pointed at a local test server); None rebuilds from env"""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, pool
+    if old is not None and old is not pool:
+        old.close()
+
+def send_message(msg: Message):
+    """Send through the shared pool; raises on failure"""
+    get_smtp_pool().send(msg)
+
+def smtp_pool_stats() -> dict:
+    return get_smtp_pool().stats() if _pool is not None else {"pool_size": SMTP_POOL_SIZE, "idle_connections": 0}
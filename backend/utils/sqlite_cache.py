@@ -0,0 +1,225 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+def content_hash(*parts) -> str:
+    """Stable SHA-256 hex digest over the given parts (str or bytes)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        elif not isinstance(part, bytes):
+            part = str(part).encode("utf-8")
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class SQLiteCache:
+    """
+    Small persistent key/value cache stored in a local SQLite file.
+    Entries expire after ttl_seconds and the least recently used ones are
+    evicted once max_entries or max_bytes is exceeded. A hit refreshes the
+    entry's access time only if it is older than touch_seconds, so repeated
+    reads of a hot entry do not all queue for the write lock. The total size
+    is kept up to date by triggers, so the max_bytes check never scans.
+    """
+
+    def __init__(self, db_path: str, table: str = "cache",
+                 ttl_seconds: Optional[int] = None,
+                 max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 touch_seconds: float = 60):
+        self.db_path = db_path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.touch_seconds = touch_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    self._create_table(conn)
+                    self._initialized = True
+        return conn
+
+    def _create_table(self, conn: sqlite3.Connection):
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                meta TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_lru ON {self.table} (last_accessed)")
+        # Running total of size, seeded once from the existing rows
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table}_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                size INTEGER NOT NULL
+            )
+        """)
+        conn.execute(f"""
+            INSERT OR IGNORE INTO {self.table}_totals (id, size)
+            SELECT 0, COALESCE(SUM(size), 0) FROM {self.table}
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {self.table}_size_insert AFTER INSERT ON {self.table}
+            BEGIN UPDATE {self.table}_totals SET size = size + new.size WHERE id = 0; END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {self.table}_size_update AFTER UPDATE OF size ON {self.table}
+            BEGIN UPDATE {self.table}_totals SET size = size + new.size - old.size WHERE id = 0; END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {self.table}_size_delete AFTER DELETE ON {self.table}
+            BEGIN UPDATE {self.table}_totals SET size = size - old.size WHERE id = 0; END
+        """)
+        conn.commit()
+
+    def _error(self, operation: str, error: Exception):
+        print(f"[CACHE ERROR] {self.table} {operation} failed: {error}")
+
+    def _total_bytes(self, conn: sqlite3.Connection) -> int:
+        return conn.execute(f"SELECT size FROM {self.table}_totals WHERE id = 0").fetchone()[0]
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.get_entry(key)
+        return entry["value"] if entry else None
+
+    def get_entry(self, key: str) -> Optional[Dict]:
+        """Return {"value", "meta"} for key, or None on a miss"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT value, meta, created_at, last_accessed FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row and self.ttl_seconds is not None and now - row[2] > self.ttl_seconds:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+
+            if row is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+
+            if now - row[3] > self.touch_seconds:
+                conn.execute(f"UPDATE {self.table} SET last_accessed = ? WHERE key = ?", (now, key))
+                conn.commit()
+            with self._lock:
+                self.hits += 1
+            return {"value": row[0], "meta": row[1]}
+        except Exception as e:
+            self._error("get", e)
+            return None
+        finally:
+            conn.close()
+
+    def set(self, key: str, value: str, meta: Optional[str] = None):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        conn = self._connect()
+        try:
+            # An upsert, not INSERT OR REPLACE: REPLACE's implicit delete skips the size triggers
+            conn.execute(f"""
+                INSERT INTO {self.table} (key, value, meta, size, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value, meta = excluded.meta, size = excluded.size,
+                    created_at = excluded.created_at, last_accessed = excluded.last_accessed
+            """, (key, value, meta, size, now, now))
+            self._evict(conn, now)
+            conn.commit()
+        except Exception as e:
+            self._error("set", e)
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        removed = 0
+        if self.ttl_seconds is not None:
+            removed += conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+
+        if self.max_entries is not None:
+            removed += conn.execute(f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY last_accessed DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,)).rowcount
+
+        if self.max_bytes is not None:
+            total = self._total_bytes(conn)
+            while total > self.max_bytes:
+                # Oldest entries in small pages: no full-table read to free a few rows
+                oldest = conn.execute(
+                    f"SELECT key, size FROM {self.table} ORDER BY last_accessed ASC LIMIT 64"
+                ).fetchall()
+                if not oldest:
+                    break
+                for key, size in oldest:
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    total -= size
+                    removed += 1
+
+        if removed:
+            with self._lock:
+                self.evictions += removed
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            conn.execute(f"DELETE FROM {self.table}")
+            conn.commit()
+        except Exception as e:
+            self._error("clear", e)
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        conn = self._connect()
+        entries, total_bytes = 0, 0
+        try:
+            entries = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            total_bytes = self._total_bytes(conn)
+        except Exception as e:
+            self._error("stats", e)
+        finally:
+            conn.close()
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "size_bytes": total_bytes,
+            }
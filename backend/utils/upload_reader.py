@@ -0,0 +1,82 @@
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+import os
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Whole request bodies (all files plus form fields); enforced by RequestSizeLimitMiddleware
+# while the body streams in, before Starlette spools it to memory or disk
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(MAX_UPLOAD_BYTES + 1024 * 1024)))
+
+
+class _BodyTooLarge(HTTPException):
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=f"Request body exceeds the {limit} byte limit")
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject request bodies over a per-path byte limit (default_limit for
+    paths not in limits): at once if Content-Length is too large, otherwise
+    as soon as the bytes received so far pass the limit, so an oversized
+    upload is never buffered in full.
+    """
+
+    def __init__(self, app, default_limit: int = MAX_REQUEST_BYTES, limits: dict = None):
+        self.app = app
+        self.default_limit = default_limit
+        self.limits = limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        limit = self.limits.get(scope["path"], self.default_limit)
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            return await self._reject(scope, receive, send, limit)
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # An HTTPException, so FastAPI's body parsing re-raises it as a 413
+                    raise _BodyTooLarge(limit)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send, limit)
+
+    async def _reject(self, scope, receive, send, limit: int):
+        error = _BodyTooLarge(limit)
+        response = JSONResponse({"detail": error.detail}, status_code=413, headers={"Connection": "close"})
+        await response(scope, receive, send)
+
+
+async def read_upload(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Read one uploaded file (already received and spooled by Starlette) into
+    memory, rejecting it with 413 if it is over max_bytes. The request as a
+    whole is capped earlier, while it streams in, by RequestSizeLimitMiddleware.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"{upload.filename} exceeds the {max_bytes} byte upload limit")
+
+    data = await upload.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"{upload.filename} exceeds the {max_bytes} byte upload limit")
+    return data
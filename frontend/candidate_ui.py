@@ -1,6 +1,7 @@
 # candidate_ui.py
 import streamlit as st
 import requests
+from datetime import datetime
 
 API_BASE = "http://localhost:8000"  # adjust if running on different port
 
@@ -18,7 +19,9 @@ if name and email:
     # Step 2: Fetch available slots
     try:
         res = requests.get(f"{API_BASE}/available-slots")
-        slots = res.json().get("available_slots", [])
+        days = res.json().get("available_slots", {})
+        # {date: [{"start", "end", "free_calendars"}]} -> one entry per slot start
+        slots = [slot["start"] for day_slots in days.values() for slot in day_slots]
     except Exception as e:
         st.error("Error fetching slots from server.")
         st.stop()
@@ -27,8 +30,11 @@ if name and email:
         st.warning("No slots available at the moment.")
         st.stop()
 
-    # Show slot options
-    selected_slot = st.selectbox("Available Time Slots", slots)
+    # Show slot options, e.g. "Mon 03 Nov 2025, 10:00"
+    selected_slot = st.selectbox(
+        "Available Time Slots", slots,
+        format_func=lambda start: datetime.fromisoformat(start).strftime("%a %d %b %Y, %H:%M")
+    )
 
     if st.button("✅ Confirm Slot"):
         payload = {
@@ -20,7 +20,12 @@ if submitted:
 
             if "score" in result:
                 st.success("✅ Resume Scored Successfully")
-                st.markdown(result["score"])
+                st.metric("Score", f"{result['score']}/100")
+                st.markdown(f"**Justification:** {result['justification']}")
+                if result.get("matched_skills"):
+                    st.markdown("**Matched skills:** " + ", ".join(result["matched_skills"]))
+                if result.get("missing_skills"):
+                    st.markdown("**Missing skills:** " + ", ".join(result["missing_skills"]))
             else:
                 st.error(result.get("error", "Unexpected error occurred"))
 